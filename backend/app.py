@@ -1,10 +1,11 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
 import time
 import asyncio
-from typing import Optional
+from typing import List, Optional
 import json
 import os
 import tempfile
@@ -12,12 +13,22 @@ import logging
 from pathlib import Path
 import base64
 import numpy as np
-import cv2
 
 # Import your ML utilities
-from utils.audio_utils import generate_tts
-from utils.gemini_utils import interpret_text
-from utils.ml_utils import predict_sign
+from utils.asset_bundle import AssetBundle, parse_range
+from utils.audio_utils import generate_tts, tts_cache
+from utils.gemini_utils import interpret_text, interpret_stats, rephrase_for_signs
+from utils.executors import IOStage, KeypointStage, StageBusy
+from utils.decimation import RateController
+from utils.metrics import (REGISTRY, ACTIVE_SESSIONS, FRAMES_CLASSIFIED, FRAMES_DROPPED, FRAMES_RECEIVED,
+                           FRAMES_SKIPPED, PREDICTIONS, QUEUE_DEPTH, SESSION_FPS)
+from utils.ml_utils import (fit_window, predict_sequence_async, scheduler, SegmentClassifier, SEQ_LENGTH,
+                            INPUT_FEATURES, HAND_FEATURES)
+from utils.phrase_index import PhraseIndex, SIGN_GIF_DIR
+from utils.segmenter import MotionSegmenter
+from utils.uploads import UploadRejected, receive_video
+from utils.transcription import (LabelMerger, WindowSlider, chunk_ranges, TRANSCRIBE_MIN_CONFIDENCE,
+                                 TRANSCRIBE_STRIDE)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +53,7 @@ app.add_middleware(
 # Configuration
 BASE_DIR = Path(__file__).resolve().parent
 MAPPING_FILE = BASE_DIR / "mapping.json"
+LABELS_FILE = BASE_DIR / "server" / "mapping.json"  # model class index -> sign label
 UPLOAD_DIR = BASE_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
@@ -50,6 +62,24 @@ ALLOWED_VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".webm"}
 ALLOWED_AUDIO_EXTENSIONS = {".mp3", ".wav", ".ogg", ".webm", ".m4a"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 
+# OpenAPI body of the upload routes, which read their request stream themselves
+VIDEO_UPLOAD_BODY = {"requestBody": {"required": True, "content": {
+    "multipart/form-data": {"schema": {"type": "object", "required": ["file"],
+                                       "properties": {"file": {"type": "string", "format": "binary"}}}},
+    "video/*": {"schema": {"type": "string", "format": "binary"}},
+}}}
+
+# Sentences (besides every sign label) synthesised at startup
+TTS_PREWARM_TOP = int(os.getenv("TTS_PREWARM_TOP", 50))
+
+# Worker pools: decode + MediaPipe in processes, Gemini / gTTS in threads
+# (sizes and queue limits: CPU_WORKERS, CPU_QUEUE_LIMIT, IO_WORKERS, IO_QUEUE_LIMIT)
+keypoint_stage = KeypointStage()
+io_stage = IOStage()
+QUEUE_DEPTH.labels("keypoints").set_function(lambda: keypoint_stage.pending)
+QUEUE_DEPTH.labels("io").set_function(lambda: io_stage.pending)
+QUEUE_DEPTH.labels("inference").set_function(lambda: scheduler.queue_depth())
+
 # Load sign mapping
 try:
     with open(MAPPING_FILE, "r", encoding="utf-8") as f:
@@ -59,6 +89,12 @@ except FileNotFoundError:
     logger.error(f"Mapping file not found: {MAPPING_FILE}")
     mapping = {"default": "unknown_sign.gif"}
 
+# Sign library (frontend/public/asl_gifs, or SIGN_GIF_DIR) compiled for text -> sign lookups
+phrase_index = PhraseIndex.from_directory()
+logger.info(f"Indexed {len(phrase_index.signs)} signs for text-to-sign")
+# Same library as one file for preloading / range requests, built on first use
+asset_bundle = AssetBundle()
+
 # --------------- MODELS ---------------
 
 class TextRequest(BaseModel):
@@ -66,8 +102,10 @@ class TextRequest(BaseModel):
 
 class TextResponse(BaseModel):
     input_text: str
-    interpreted_text: str
+    interpreted_text: str  # sign names and leftover words in order, e.g. "GOOD-MORNING FRIEND weather"
     sign_asset: str
+    signs: List[str] = []      # playlist: /asl_gifs/<name>.gif each
+    unmatched: List[str] = []  # words no sign covers, even after rephrasing
     audio_path: Optional[str] = None
 
 class SignDetectResponse(BaseModel):
@@ -84,104 +122,397 @@ async def root():
 
 @app.post("/process_text", response_model=TextResponse)
 async def process_text(req: TextRequest):
-    """Voice → Sign: Interpret text and generate TTS + Sign visual"""
+    """Voice → Sign: turn text into a sign playlist + TTS.
+
+    Signs come from the phrase index; only words it can't cover are sent to
+    the LLM to be rephrased in the sign vocabulary.
+    """
     try:
         user_text = req.text.lower()
-        interpreted_text = interpret_text(user_text)
-        sign_asset = mapping.get(interpreted_text, mapping.get("default"))
-        audio_path = generate_tts(interpreted_text)
+        plan = phrase_index.translate(user_text)
+        items = plan.items
+        if plan.uncovered:
+            try:
+                rewrites = iter(await io_stage.run(rephrase_for_signs, plan.uncovered, phrase_index.signs))
+                items = []
+                for kind, value in plan.items:
+                    items.extend(phrase_index.translate(next(rewrites), record=False).items if kind == "gap"
+                                 else [(kind, value)])
+            except StageBusy as e:
+                logger.warning(f"Leaving {len(plan.uncovered)} phrases unsigned: {e}")
+        signs = [value for kind, value in items if kind == "sign"]
+        unmatched = [word for kind, value in items if kind == "gap" for word in value.split()]
+        audio_path = await io_stage.run(generate_tts, req.text)
         return {
         "input_text": user_text,
-        "interpreted_text": interpreted_text,
-        "sign_asset": sign_asset,
+        "interpreted_text": " ".join(value for _, value in items),
+        "sign_asset": f"{signs[0]}.gif" if signs else mapping.get("default", "unknown_sign.gif"),
+        "signs": signs,
+        "unmatched": unmatched,
         "audio_path": audio_path,
         }
+    except StageBusy as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     except Exception as e:
         logger.error(f"Error in process_text: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def classify_keypoints(seq):
+    """Classify an extracted keypoint sequence on the shared inference scheduler"""
+    if seq.size == 0:
+        return "no_hand_detected", None
+    return await predict_sequence_async(fit_window(seq))
+
+@app.get("/ready")
+async def ready():
+    """200 once this worker has warmed its keypoint workers and run a warm-up inference"""
+    if not getattr(app.state, "ready", False):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="warming up")
+    return {"ready": True}
+
+@app.get("/inference_stats")
+async def inference_stats():
+    """Batch-size and queue-wait stats of the shared inference scheduler"""
+    return scheduler.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage latency histograms, frame counters and queue gauges of this worker in Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """Hit/miss counters of the sentence interpretation and TTS caches, and phrase-index coverage"""
+    return {"interpret": interpret_stats(), "tts": tts_cache.stats(), "phrases": phrase_index.stats()}
+
+@app.get("/sign_index")
+async def sign_index():
+    """Sign asset index written by frontend/video2gif.py --manifest: variants, sizes and durations"""
+    path = os.path.join(SIGN_GIF_DIR, "index.json")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No sign index; run video2gif.py --manifest")
+    return FileResponse(path, media_type="application/json")
+
+async def bundle_snapshot():
+    """The current sign bundle, rebuilt on the IO stage if the assets changed"""
+    try:
+        return await io_stage.run(asset_bundle.current)
+    except StageBusy as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+@app.get("/sign_bundle/index")
+async def sign_bundle_index(request: Request):
+    """Offset/length/type of every asset in the sign bundle, and the bundle version"""
+    snapshot = await bundle_snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse({**snapshot.index, "url": f"/sign_bundle?v={snapshot.version}"}, headers=headers)
+
+@app.get("/sign_bundle")
+async def sign_bundle(request: Request, v: Optional[str] = None):
+    """All sign assets in one body; supports single byte ranges, ETag and If-Range.
+
+    Fetch it as /sign_bundle?v=<version from the index>: that URL never
+    changes content and is cacheable for a year. Without (or with a stale)
+    `v`, clients must revalidate.
+    """
+    snapshot = await bundle_snapshot()
+    headers = {
+        "ETag": snapshot.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable" if v == snapshot.version else "no-cache",
+    }
+    if request.headers.get("if-none-match") == snapshot.etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    byte_range = None
+    if request.headers.get("if-range", snapshot.etag) == snapshot.etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), snapshot.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{snapshot.size}"})
+    start, end = byte_range or (0, snapshot.size)
+    headers["Content-Length"] = str(end - start)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{snapshot.size}"
+    return StreamingResponse(snapshot.iter_bytes(start, end), headers=headers,
+                             status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+                             media_type="application/octet-stream")
+
+async def receive_upload(request: Request):
+    """Spool a video upload (multipart "file" field or raw video/* body) to UPLOAD_DIR within the limits"""
+    try:
+        return await receive_video(request, MAX_FILE_SIZE, ALLOWED_VIDEO_EXTENSIONS, UPLOAD_DIR)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
 # Keep old file-based route for reference
-@app.post("/sign_detect", response_model=SignDetectResponse)
-async def sign_detect(file: UploadFile = File(...)):
+@app.post("/sign_detect", response_model=SignDetectResponse, openapi_extra=VIDEO_UPLOAD_BODY)
+async def sign_detect(request: Request):
     """Single video prediction"""
-    result_text, confidence = predict_sign(file)
-    audio_path = generate_tts(result_text)
+    upload = await receive_upload(request)
+    try:
+        seq = await keypoint_stage.extract(upload.path, upload.suffix)
+        FRAMES_RECEIVED.labels("upload").inc(len(seq))
+        FRAMES_CLASSIFIED.labels("upload").inc(len(seq))
+        result_text, confidence = await classify_keypoints(seq)
+        audio_path = await io_stage.run(generate_tts, result_text)
+    except StageBusy as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    finally:
+        upload.remove()
     return {
         "predicted_sign": result_text,
         "confidence": confidence,
         "audio_path": audio_path
     }
 
+async def transcribe_records(upload, probe, stride, min_confidence):
+    """NDJSON lines of merged sign records for a whole video, yielded as its chunks finish.
+
+    `probe` is the video's (start, duration, fps). Chunks are extracted on up
+    to one keypoint worker each, ahead of the one being classified; each
+    chunk's complete windows go to the inference scheduler together so they
+    share batches. The spooled upload is removed when the stream ends.
+    """
+    data, suffix = upload.path, upload.suffix
+    start, duration, fps = probe
+    ranges = chunk_ranges(start or 0.0, duration)
+    slider = WindowSlider(SEQ_LENGTH, stride, fps)
+    merger = LabelMerger()
+    pending = []
+    try:
+        for chunk in range(len(ranges)):
+            # keep every worker busy with the chunks after this one
+            while len(pending) < keypoint_stage.workers and chunk + len(pending) < len(ranges):
+                pending.append(asyncio.ensure_future(
+                    keypoint_stage.extract_range(data, suffix, *ranges[chunk + len(pending)])))
+            rows, times = await pending.pop(0)
+            FRAMES_RECEIVED.labels("transcribe").inc(len(rows))
+            windows = slider.add(rows, times - (start or 0.0))
+            if chunk == len(ranges) - 1:
+                windows += slider.finish()
+            # windows without hands are gaps and never reach the model
+            hands = [bool(np.any(window[:, -HAND_FEATURES:])) for _, _, window in windows]
+            results = iter(await asyncio.gather(*(predict_sequence_async(window)
+                                                  for (_, _, window), present in zip(windows, hands) if present)))
+            FRAMES_CLASSIFIED.labels("transcribe").inc(sum(hands) * SEQ_LENGTH)
+            for (begin, end, _), present in zip(windows, hands):
+                sign, confidence = next(results) if present else (None, 0.0)
+                if confidence < min_confidence:
+                    sign = None
+                for record in merger.add(begin, end, sign, confidence):
+                    PREDICTIONS.labels("transcribe").inc()
+                    yield json.dumps(record) + "\n"
+        for record in merger.flush():
+            PREDICTIONS.labels("transcribe").inc()
+            yield json.dumps(record) + "\n"
+    except StageBusy as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+    finally:
+        for task in pending:
+            task.cancel()
+        upload.remove()
+
+@app.post("/sign_transcribe", openapi_extra=VIDEO_UPLOAD_BODY)
+async def sign_transcribe(request: Request, stride: int = TRANSCRIBE_STRIDE,
+                          min_confidence: float = TRANSCRIBE_MIN_CONFIDENCE):
+    """
+    Whole-video transcription: slides a SEQ_LENGTH window over the video
+    `stride` frames at a time and streams one NDJSON line per run of
+    windows with the same sign, {"start", "end", "sign", "confidence"}
+    (seconds), while later parts of the video are still being decoded.
+    """
+    if stride < 1:
+        raise HTTPException(status_code=422, detail="stride must be at least 1")
+    upload = await receive_upload(request)
+    # probe before the 200 goes out, so a busy keypoint stage is still a 503
+    try:
+        probe = await keypoint_stage.probe(upload.path)
+    except StageBusy as e:
+        upload.remove()
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except BaseException:
+        upload.remove()
+        raise
+    # the background task covers a client that leaves before the stream starts
+    return StreamingResponse(transcribe_records(upload, probe, stride, min_confidence),
+                             media_type="application/x-ndjson", background=BackgroundTask(upload.remove))
+
 # --------------- REALTIME WEBSOCKET ROUTE ---------------
 
-@app.websocket("/ws/sign_detect")
-async def websocket_sign_detect(websocket: WebSocket):
+async def send_final_sentence(websocket: WebSocket, sign_sequence):
+    """Refine a finished run of signs into a sentence and push it with its audio"""
+    raw_sentence = " ".join(sign_sequence)
+    clean_sentence, audio_path = raw_sentence, None
+    try:
+        # gemini refinement
+        clean_sentence = await io_stage.run(interpret_text, raw_sentence)
+
+        # generate TTS
+        audio_path = await io_stage.run(generate_tts, clean_sentence)
+    except StageBusy as e:
+        logger.warning(f"Sending sentence without refinement/audio: {e}")
+
+    await websocket.send_json({
+        "final_sentence": clean_sentence,
+        "audio_path": audio_path
+    })
+
+async def follow_segments(websocket: WebSocket, mode, segmenter, classifier, frames, sign_sequence):
     """
-    Real-time Sign Detection via WebSocket.
-    Frontend sends base64 frames from webcam.
-    Backend returns live predictions.
+    Run a session's keypoint frames through its segmenter: classify each
+    finished candidate sign and close the sentence when the hands pause.
     """
-    await websocket.accept()
-    logger.info("✅ WebSocket connection established")
+    idle_before = segmenter.idle_frames
+    for kind, value in segmenter.push_many(frames):
+        if kind == "start":
+            classifier.begin()
+        if kind in ("start", "frames"):
+            classifier.extend(value)
+        elif kind == "end":
+            predicted_sign, confidence = await classifier.finish()
+            FRAMES_CLASSIFIED.labels(mode).inc(value)
+            PREDICTIONS.labels(mode).inc()
+            sign_sequence.append(predicted_sign)
+            await websocket.send_json({
+                "current_sign": predicted_sign,
+                "confidence": confidence
+            })
+        elif kind == "discard":
+            FRAMES_DROPPED.labels(mode, "short_segment").inc(value)
+        elif kind == "pause" and sign_sequence:
+            await send_final_sentence(websocket, sign_sequence)
+            sign_sequence.clear()
+    if segmenter.idle_frames > idle_before:
+        FRAMES_DROPPED.labels(mode, "idle").inc(segmenter.idle_frames - idle_before)
+
+async def video_chunk_stream(websocket: WebSocket):
+    """Video mode: every message is a chunk of encoded video bytes"""
     sign_sequence = []
-    last_detection_time = time.time()
+    segmenter = MotionSegmenter(HAND_FEATURES)
+    classifier = SegmentClassifier()
+    # Pin the connection to one keypoint worker so hand tracking carries
+    # over from chunk to chunk (StageBusy if every worker's graphs are taken)
+    session = keypoint_stage.open_session()
+    # MediaPipe skips still frames, and more of them while that worker is backed up
+    rate = RateController()
+    fps = SESSION_FPS.labels(str(session[0]))
     try:
         while True:
             try:
                 # Receive chunk of video bytes
                 data = await websocket.receive_bytes()
-                predicted_sign, confidence = predict_sign(data)
-                current_time = time.time()
-                
-                if predicted_sign != "no_hand_detected":
-                    sign_sequence.append(predicted_sign)
-                    last_detection_time = current_time
-                    
-                    # send intermediate prediction
-                    await websocket.send_json({
-                        "current_sign": predicted_sign,
-                        "confidence": confidence
-                    })
-                    
-                # If pause detected -> form full sentence
-                if current_time - last_detection_time > 2 and len(sign_sequence) > 0:
-                    raw_sentence = " ".join(sign_sequence)
-                    sign_sequence = []  # reset for next sentence
-                    
-                    # gemini refinement
-                    clean_senetence = interpret_text(raw_sentence)
-                    
-                    # generate TTS
-                    audio_path = generate_tts(clean_senetence)
-                    
-                    await websocket.send_json({
-                        "final_sentence": clean_sentence,
-                        "audio_path": audio_path
-                    })
-                await asyncio.sleep(0.1)  # slight delay to yield control
+                stride = rate.update(keypoint_stage.backlog(session))
+                try:
+                    seq, skipped = await keypoint_stage.extract_for_session(session, data, stride=stride)
+                except StageBusy as e:
+                    # drop the chunk rather than queue behind a saturated worker
+                    await websocket.send_json({"error": str(e)})
+                    continue
+                FRAMES_RECEIVED.labels("video").inc(len(seq))
+                for reason, count in skipped.items():
+                    FRAMES_SKIPPED.labels("video", reason).inc(count)
+                fps.set(rate.record(len(seq) - sum(skipped.values()), time.monotonic()))
+                if len(seq):
+                    await follow_segments(websocket, "video", segmenter, classifier, seq, sign_sequence)
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
                 logger.error(f"WebSocket processing error: {e}")
                 print("Websocket closed:",e)
                 break
-            
+    finally:
+        SESSION_FPS.remove(str(session[0]))
+        await keypoint_stage.close_session(session)
 
+async def landmark_stream(websocket: WebSocket):
+    """
+    Landmark mode: every message carries one or more little-endian float32
+    keypoint frames of INPUT_FEATURES values each. A motion segmenter picks
+    out candidate signs; each is classified once, when it ends.
+    """
+    segmenter = MotionSegmenter(HAND_FEATURES)
+    classifier = SegmentClassifier()
+    sign_sequence = []
+    while True:
+        data = await websocket.receive_bytes()
+        if len(data) == 0 or len(data) % (INPUT_FEATURES * 4) != 0:
+            FRAMES_DROPPED.labels("landmarks", "malformed").inc(max(1, len(data) // (INPUT_FEATURES * 4)))
+            await websocket.send_json({
+                "error": f"expected a multiple of {INPUT_FEATURES} float32 values per message"
+            })
+            continue
+        frames = np.frombuffer(data, dtype="<f4").reshape(-1, INPUT_FEATURES)
+        FRAMES_RECEIVED.labels("landmarks").inc(len(frames))
+        await follow_segments(websocket, "landmarks", segmenter, classifier, frames, sign_sequence)
 
+@app.websocket("/ws/sign_detect")
+async def websocket_sign_detect(websocket: WebSocket):
+    """
+    Real-time Sign Detection via WebSocket.
+    Default: frontend sends chunks of webcam video.
+    ?mode=landmarks: frontend sends float32 keypoint frames instead.
+    Backend returns a prediction per detected sign and a sentence per pause.
+    """
+    await websocket.accept()
+    mode = websocket.query_params.get("mode", "video")
+    logger.info(f"✅ WebSocket connection established ({mode} mode)")
+    sessions = ACTIVE_SESSIONS.labels("landmarks" if mode == "landmarks" else "video")
+    sessions.inc()
+    close_code = status.WS_1000_NORMAL_CLOSURE
+    try:
+        if mode == "landmarks":
+            await landmark_stream(websocket)
+        else:
+            await video_chunk_stream(websocket)
     except WebSocketDisconnect:
         logger.info("❌ WebSocket connection closed")
+    except StageBusy as e:
+        # no MediaPipe graph left for this session: the client should retry later
+        logger.warning(f"Refusing video session: {e}")
+        await websocket.send_json({"error": str(e)})
+        close_code = status.WS_1013_TRY_AGAIN_LATER
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        await websocket.close()
+        sessions.dec()
+        await websocket.close(code=close_code)
 
 # --------------- SERVER STARTUP ---------------
 
+def prewarm_tts():
+    """Synthesise every sign label and the most frequent cached sentences ahead of time"""
+    try:
+        with open(LABELS_FILE, "r", encoding="utf-8") as f:
+            labels = list(json.load(f).values())
+    except FileNotFoundError:
+        labels = []
+    synthesised = tts_cache.prewarm(labels + tts_cache.most_frequent(TTS_PREWARM_TOP))
+    if synthesised is None:
+        logger.info("TTS cache is being warmed by another worker")
+        return
+    logger.info(f"TTS cache warm: {synthesised} new clips, {tts_cache.stats()['entries']} cached")
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Real-time Sign Translator starting up...")
+    await keypoint_stage.warm()
+    logger.info(f"{len(keypoint_stage.lanes)} keypoint workers warmed")
+    # first forward pass: starts the scheduler thread and any lazy backend setup
+    await predict_sequence_async(np.zeros((SEQ_LENGTH, INPUT_FEATURES), dtype=np.float32))
+    app.state.ready = True
+    logger.info("Ready")
+    # in the background: the server is usable while clips are synthesised
+    asyncio.get_running_loop().run_in_executor(io_stage.executor, prewarm_tts)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("👋 Shutting down server...")
+    keypoint_stage.shutdown()
+    io_stage.shutdown()
+    scheduler.stop()
+    tts_cache.flush()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,79 @@
+"""
+Parity and latency of the inference backends against the Keras model on the
+saved validation set.
+
+For every backend whose artefact exists (model_best.tflite / model_best.npz,
+see export_model.py) this reports the max absolute probability difference to
+Keras, argmax agreement, validation accuracy, and per-window latency at batch
+size 1 and 32. Exits non-zero if a backend drifts past the tolerance.
+
+Usage (from backend/):
+    python -m benchmarks.backend_parity [--atol 1e-4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from utils.inference_backends import (
+    INFERENCE_BACKENDS, MODEL_PATH, NUMPY_WEIGHTS_PATH, TFLITE_MODEL_PATH, apply_normalization, load_backend,
+    load_normalization,
+)
+
+ARTEFACTS = {"keras": MODEL_PATH, "tflite": TFLITE_MODEL_PATH, "numpy": NUMPY_WEIGHTS_PATH}
+
+
+def latency_ms(backend, X, batch_size, repeats=20):
+    """Median wall time per window when predicting `batch_size` windows at once"""
+    batch = X[:batch_size]
+    backend.predict(batch)  # warm-up (graph tracing, tensor allocation)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict(batch)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000 / len(batch)
+
+
+def predict_all(backend, X, batch_size=64):
+    return np.concatenate([backend.predict(X[i:i + batch_size]) for i in range(0, len(X), batch_size)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends with Keras")
+    parser.add_argument("--x", default="X_val.npy")
+    parser.add_argument("--y", default="y_val.npy")
+    parser.add_argument("--atol", type=float, default=1e-4, help="max allowed probability difference")
+    args = parser.parse_args()
+
+    X = np.load(args.x).astype(np.float32)
+    y = np.argmax(np.load(args.y), axis=1)
+
+    # same input standardization as the server, if the model has stats
+    stats = load_normalization()
+    reference = apply_normalization(load_backend("keras"), stats)
+    ref_probs = predict_all(reference, X)
+
+    failed = False
+    print(f"{'backend':<8}{'max |dp|':>12}{'argmax agree':>14}{'val acc':>9}{'ms/win @1':>11}{'ms/win @32':>12}")
+    for name in INFERENCE_BACKENDS:
+        if not os.path.exists(ARTEFACTS[name]):
+            print(f"{name:<8} skipped: {ARTEFACTS[name]} not found (run export_model.py)")
+            continue
+        backend = reference if name == "keras" else apply_normalization(load_backend(name), stats)
+        probs = predict_all(backend, X)
+        diff = float(np.abs(probs - ref_probs).max())
+        agree = float((probs.argmax(1) == ref_probs.argmax(1)).mean())
+        acc = float((probs.argmax(1) == y).mean())
+        print(f"{name:<8}{diff:>12.2e}{agree:>14.3f}{acc:>9.3f}"
+              f"{latency_ms(backend, X, 1):>11.3f}{latency_ms(backend, X, 32):>12.3f}")
+        if diff > args.atol:
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare the in-memory (PyAV) decode path with the temp-file + cv2.VideoCapture
+fallback on every allowed upload container.
+
+Usage (from backend/):
+    python -m benchmarks.decode_benchmark                 # synthetic clips
+    python -m benchmarks.decode_benchmark a.mp4 b.webm    # your own clips
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from utils.video_utils import iter_frames_in_memory, iter_frames_via_tempfile
+
+# container -> fourcc OpenCV can write it with
+SYNTHETIC_FORMATS = {
+    ".mp4": "mp4v",
+    ".mov": "mp4v",
+    ".avi": "MJPG",
+    ".webm": "VP80",
+}
+REPEATS = 5
+
+
+def make_synthetic_clip(suffix, fourcc, frames=60, size=(640, 480), fps=30):
+    """Write a short moving-square clip and return its bytes (None if the codec is unavailable)"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        path = tmp.name
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+    if not writer.isOpened():
+        os.remove(path)
+        return None
+    w, h = size
+    for i in range(frames):
+        frame = np.full((h, w, 3), 40, dtype=np.uint8)
+        x = (i * 8) % (w - 80)
+        cv2.rectangle(frame, (x, h // 3), (x + 80, h // 3 + 80), (0, 200, 255), -1)
+        writer.write(frame)
+    writer.release()
+    with open(path, "rb") as f:
+        data = f.read()
+    os.remove(path)
+    return data
+
+
+def time_path(decode, data, suffix):
+    """Best-of-REPEATS wall time and frame count for one decode path"""
+    best = float("inf")
+    count = 0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        try:
+            count = sum(1 for _ in decode(data, suffix))
+        except ValueError:
+            return None, 0
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+
+def main():
+    clips = []
+    if len(sys.argv) > 1:
+        for path in sys.argv[1:]:
+            with open(path, "rb") as f:
+                clips.append((os.path.basename(path), os.path.splitext(path)[1].lower(), f.read()))
+    else:
+        for suffix, fourcc in SYNTHETIC_FORMATS.items():
+            data = make_synthetic_clip(suffix, fourcc)
+            if data is None:
+                print(f"[SKIP] cannot write synthetic {suffix} ({fourcc}) with this OpenCV build")
+                continue
+            clips.append((f"synthetic{suffix}", suffix, data))
+
+    paths = {
+        "in-memory": lambda data, suffix: iter_frames_in_memory(data),
+        "tempfile": iter_frames_via_tempfile,
+    }
+    print(f"{'clip':<20}{'size':>10}{'path':>12}{'frames':>8}{'ms':>10}{'ms/frame':>10}")
+    for name, suffix, data in clips:
+        for label, decode in paths.items():
+            elapsed, count = time_path(decode, data, suffix)
+            if elapsed is None:
+                print(f"{name:<20}{len(data):>10}{label:>12}{'-':>8}{'n/a':>10}{'':>10}")
+                continue
+            per_frame = elapsed * 1000 / count if count else float("nan")
+            print(f"{name:<20}{len(data):>10}{label:>12}{count:>8}{elapsed * 1000:>10.1f}{per_frame:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
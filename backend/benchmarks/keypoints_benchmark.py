@@ -0,0 +1,98 @@
+"""
+Per-frame cost of turning MediaPipe Holistic results into a keypoint vector:
+the previous list-of-arrays + concatenate version vs extract_keypoints
+writing into a preallocated float32 row.
+
+Builds realistic landmark protobufs, so no camera or video is needed.
+Reading each landmark attribute from the protobuf costs the same in both
+versions and dominates; the gain is from skipping the per-group Python
+lists, float64 arrays and concatenate - about 1.2-1.4x for pose+face+two
+hands (e.g. ~585us -> ~475us per frame), not several times.
+
+Usage (from backend/):
+    python -m benchmarks.keypoints_benchmark
+"""
+
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from mediapipe_utils import NUM_FEATURES, extract_keypoints
+
+FRAMES = 2000
+
+
+def legacy_extract_keypoints(results):
+    """The extraction as it was before writing into a caller buffer"""
+    pose = np.array([[res.x, res.y, res.z, res.visibility]
+                     for res in results.pose_landmarks.landmark]).flatten() \
+           if results.pose_landmarks else np.zeros(33*4)
+    if results.face_landmarks:
+        face = np.array([[lm.x, lm.y, lm.z]
+                         for lm in results.face_landmarks.landmark]).flatten()
+        if face.shape[0] > 468 * 3:
+            face = face[:468 * 3]
+        elif face.shape[0] < 468 * 3:
+            face = np.pad(face, (0, 468 * 3 - face.shape[0]))
+    else:
+        face = np.zeros(468 * 3)
+    left_hand = np.array([[res.x, res.y, res.z]
+                          for res in results.left_hand_landmarks.landmark]).flatten() \
+                if results.left_hand_landmarks else np.zeros(21*3)
+    right_hand = np.array([[res.x, res.y, res.z]
+                           for res in results.right_hand_landmarks.landmark]).flatten() \
+                 if results.right_hand_landmarks else np.zeros(21*3)
+    return np.concatenate([pose, face, left_hand, right_hand])
+
+
+def fake_landmarks(count, with_visibility=False):
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for _ in range(count):
+        lm = landmarks.landmark.add()
+        lm.x, lm.y, lm.z = random.random(), random.random(), random.uniform(-0.1, 0.1)
+        if with_visibility:
+            lm.visibility = random.random()
+            lm.presence = random.random()
+    return landmarks
+
+
+def fake_results(hands=2, face_landmarks=468):
+    return SimpleNamespace(
+        pose_landmarks=fake_landmarks(33, with_visibility=True),
+        face_landmarks=fake_landmarks(face_landmarks) if face_landmarks else None,
+        left_hand_landmarks=fake_landmarks(21) if hands >= 1 else None,
+        right_hand_landmarks=fake_landmarks(21) if hands >= 2 else None,
+    )
+
+
+def per_frame_us(fn, results):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        fn(results)
+    return (time.perf_counter() - start) / FRAMES * 1e6
+
+
+def main():
+    buffer = np.zeros((FRAMES, NUM_FEATURES), dtype=np.float32)
+    cases = {
+        "pose+face+2 hands": fake_results(hands=2),
+        "pose+face+1 hand": fake_results(hands=1),
+        "refined face (478)": fake_results(face_landmarks=478),
+        "pose only": fake_results(hands=0, face_landmarks=0),
+    }
+    print(f"{'case':<22}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    for name, results in cases.items():
+        expected = legacy_extract_keypoints(results).astype(np.float32)
+        assert np.array_equal(extract_keypoints(results, buffer[0]), expected), name
+
+        row = iter(range(10**9))
+        before = per_frame_us(legacy_extract_keypoints, results)
+        after = per_frame_us(lambda r: extract_keypoints(r, buffer[next(row) % FRAMES]), results)
+        print(f"{name:<22}{before:>12.1f}{after:>12.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Per-frame MediaPipe time vs keypoint accuracy of ROI tracking
+(utils/roi_tracker.py) against plain full-frame Holistic.
+
+Clips default to the signer GIFs in frontend/public/asl_gifs, upscaled by
+--scale to webcam-like resolution (320x180 x4 = 1280x720). Each clip runs
+through fresh graphs both ways; the full-frame keypoints are the reference.
+Reported per clip: ms/frame for both, hand-presence agreement, and the mean
+absolute hand / pose / face landmark error in pixels of the scaled frame.
+
+Usage (from backend/):
+    python -m benchmarks.roi_benchmark
+    python -m benchmarks.roi_benchmark --video clip1.mp4 clip2.mp4 --scale 1 --refresh 10
+"""
+
+import argparse
+import glob
+import time
+
+import cv2
+import numpy as np
+
+from mediapipe_utils import FACE_SLICE, LEFT_HAND_SLICE, NUM_FEATURES, POSE_SLICE, RIGHT_HAND_SLICE
+from utils.keypoint_utils import extract_keypoints_from_frames, holistic_pool
+from utils.roi_tracker import ROI_MAX_SIDE, ROI_REFRESH, ROITracker
+from utils.video_utils import iter_frames_from_file
+
+DEFAULT_CLIPS = "../frontend/public/asl_gifs/*.gif"
+
+
+def load_frames(path, scale):
+    frames = list(iter_frames_from_file(path))
+    if scale != 1:
+        frames = [cv2.resize(f, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC) for f in frames]
+    return frames
+
+
+def run_full(frames):
+    with holistic_pool.session() as holistic:
+        start = time.perf_counter()
+        seq = extract_keypoints_from_frames(frames, holistic)
+        return seq, time.perf_counter() - start
+
+
+def run_roi(frames, refresh, max_side):
+    with holistic_pool.session() as detector, holistic_pool.session() as tracker:
+        roi = ROITracker(detector, tracker, refresh=refresh, max_side=max_side)
+        seq = np.zeros((len(frames), NUM_FEATURES), dtype=np.float32)
+        start = time.perf_counter()
+        for i, frame in enumerate(frames):
+            roi.extract(frame, seq[i])
+        return seq, time.perf_counter() - start, roi.full_passes
+
+
+def landmark_error(ref, test, block, fields, size):
+    """Mean |dx|, |dy| in pixels over landmarks present in both sequences"""
+    a = ref[:, block].reshape(len(ref), -1, fields)[..., :2]
+    b = test[:, block].reshape(len(test), -1, fields)[..., :2]
+    both = np.any(a != 0, axis=2) & np.any(b != 0, axis=2)
+    if not both.any():
+        return float("nan")
+    return float((np.abs(a - b)[both] * size).mean())
+
+
+def hands_present(seq):
+    return np.stack([np.any(seq[:, LEFT_HAND_SLICE], axis=1), np.any(seq[:, RIGHT_HAND_SLICE], axis=1)], axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ROI tracking vs full-frame MediaPipe: time and accuracy")
+    parser.add_argument("--video", nargs="*", help="clips to use (default: the asl_gifs)")
+    parser.add_argument("--scale", type=float, default=4.0, help="upscale factor applied to every frame")
+    parser.add_argument("--refresh", type=int, default=ROI_REFRESH)
+    parser.add_argument("--max-side", type=int, default=ROI_MAX_SIDE)
+    parser.add_argument("--limit", type=int, default=12, help="max clips")
+    args = parser.parse_args()
+
+    paths = (args.video or sorted(glob.glob(DEFAULT_CLIPS)))[:args.limit]
+    print(f"{'clip':<22}{'frames':>7}{'full ms':>9}{'roi ms':>8}{'full/roi':>9}{'hands ok':>9}"
+          f"{'hand px':>9}{'pose px':>9}{'face px':>9}")
+    totals = {"frames": 0, "full": 0.0, "roi": 0.0, "agree": 0.0}
+    for path in paths:
+        frames = load_frames(path, args.scale)
+        if not frames:
+            continue
+        size = np.array(frames[0].shape[1::-1], dtype=np.float32)
+        ref, full_s = run_full(frames)
+        test, roi_s, full_passes = run_roi(frames, args.refresh, args.max_side)
+        agree = float((hands_present(ref) == hands_present(test)).mean())
+        hand = np.nanmean([landmark_error(ref, test, s, 3, size) for s in (LEFT_HAND_SLICE, RIGHT_HAND_SLICE)])
+        pose = landmark_error(ref, test, POSE_SLICE, 4, size)
+        face = landmark_error(ref, test, FACE_SLICE, 3, size)
+        n = len(frames)
+        print(f"{path.split('/')[-1][:21]:<22}{n:>7}{1000 * full_s / n:>9.2f}{1000 * roi_s / n:>8.2f}"
+              f"{full_s / roi_s:>9.2f}{agree:>9.2f}{hand:>9.1f}{pose:>9.1f}{face:>9.1f}")
+        totals["frames"] += n
+        totals["full"] += full_s
+        totals["roi"] += roi_s
+        totals["agree"] += agree * n
+    if totals["frames"]:
+        n = totals["frames"]
+        print(f"{'total':<22}{n:>7}{1000 * totals['full'] / n:>9.2f}{1000 * totals['roi'] / n:>8.2f}"
+              f"{totals['full'] / totals['roi']:>9.2f}{totals['agree'] / n:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Checks StreamingClassifier (per-frame LSTM state, numpy backend) against
+windowed NumpyBackend predictions and compares their per-frame cost.
+
+  * full window: stepping through a saved validation window from a reset
+    gives the same probabilities as predicting that window
+  * continuous stream: validation windows are played back to back; at every
+    frame the streamed output must match a windowed prediction over the
+    frames the emitting lane has seen. Also reports how often it agrees with
+    the usual last-SEQ_LENGTH-frames sliding window.
+  * segments: SegmentClassifier, fed short, full and long segments a few
+    frames at a time the way WebSocket sessions feed it, must give the label
+    and confidence of fit_window(segment) -> backend.predict on the served
+    backend (utils/ml_utils.py, loaded from SIGN_BACKEND).
+
+Exits non-zero if any difference exceeds the tolerance.
+
+Usage (from backend/, after export_model.py):
+    SIGN_BACKEND=numpy python -m benchmarks.streaming_parity [--x X_val.npy] [--atol 1e-4]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from utils.inference_backends import (
+    NORM_STATS_PATH, NUMPY_WEIGHTS_PATH, NumpyBackend, StreamingClassifier, apply_normalization, load_normalization,
+)
+
+
+SEGMENT_LENGTHS = (8, 29, 30, 31, 47, 90)
+
+
+async def segment_parity(frames, lengths=SEGMENT_LENGTHS, chunk=7, per_length=20):
+    """(max confidence difference, label mismatches, segments) of SegmentClassifier
+    against fit_window(segment) -> backend.predict"""
+    from utils import ml_utils
+
+    classifier = ml_utils.SegmentClassifier()
+    diff = 0.0
+    mismatches = count = 0
+    for length in lengths:
+        for start in range(0, min(len(frames) - length, per_length * length), length):
+            segment = frames[start:start + length]
+            classifier.begin()
+            for i in range(0, length, chunk):
+                classifier.extend(segment[i:i + chunk])
+            label, confidence = await classifier.finish()
+            reference = ml_utils.backend.predict(ml_utils.fit_window(segment)[None].astype(np.float32))[0]
+            expected_label, expected_confidence = ml_utils.top_label(reference)
+            diff = max(diff, abs(confidence - expected_confidence))
+            mismatches += int(label != expected_label)
+            count += 1
+    return diff, mismatches, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming vs windowed LSTM inference")
+    parser.add_argument("--x", default="X_val.npy")
+    parser.add_argument("--weights", default=NUMPY_WEIGHTS_PATH)
+    parser.add_argument("--stats", default=NORM_STATS_PATH, help="input normalization stats, used if present")
+    parser.add_argument("--atol", type=float, default=1e-4, help="max allowed probability difference")
+    parser.add_argument("--frames", type=int, default=600, help="length of the continuous stream")
+    args = parser.parse_args()
+
+    backend = apply_normalization(NumpyBackend(args.weights), load_normalization(args.stats))
+    X = np.load(args.x).astype(np.float32)
+    seq_length = backend.input_shape[0]
+    stream = StreamingClassifier(backend)
+
+    # full window from a reset
+    window_diff = 0.0
+    for seq in X:
+        stream.reset()
+        streamed = stream.step_many(seq)[-1]
+        window_diff = max(window_diff, float(np.abs(streamed - backend.predict(seq[None])[0]).max()))
+
+    # continuous playback
+    frames = X.reshape(-1, X.shape[-1])[:args.frames]
+    stream.reset()
+    stream_diff = 0.0
+    agree = compared = 0
+    for t, frame in enumerate(frames):
+        streamed = stream.step(frame)
+        history = int(stream.age.max())
+        reference = backend.predict(frames[t + 1 - history:t + 1][None])[0]
+        stream_diff = max(stream_diff, float(np.abs(streamed - reference).max()))
+        if t + 1 >= seq_length:
+            sliding = backend.predict(frames[t + 1 - seq_length:t + 1][None])[0]
+            agree += int(streamed.argmax() == sliding.argmax())
+            compared += 1
+
+    segment_diff, segment_mismatches, segments = asyncio.run(segment_parity(frames))
+
+    # per-frame cost when a prediction is wanted after every frame
+    stream.reset()
+    start = time.perf_counter()
+    for frame in frames:
+        stream.step(frame)
+    streamed_us = (time.perf_counter() - start) / len(frames) * 1e6
+    start = time.perf_counter()
+    for t in range(seq_length, len(frames)):
+        backend.predict(frames[t - seq_length:t][None])
+    windowed_us = (time.perf_counter() - start) / (len(frames) - seq_length) * 1e6
+
+    print(f"full window      max |dp| {window_diff:.2e} over {len(X)} windows")
+    print(f"continuous       max |dp| {stream_diff:.2e} over {len(frames)} frames")
+    print(f"segments         max |dp| {segment_diff:.2e}, {segment_mismatches} label mismatches "
+          f"over {segments} segments")
+    print(f"sliding window   argmax agreement {agree / max(compared, 1):.3f}")
+    print(f"per frame        streamed {streamed_us:.0f} us, windowed {windowed_us:.0f} us "
+          f"({windowed_us / streamed_us:.1f}x)")
+    failed = max(window_diff, stream_diff, segment_diff) > args.atol or segment_mismatches
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Offline benchmark suite for the sign-recognition hot paths. No webcam,
+network or API keys: videos are synthetic (or passed with --video), model
+inputs are the recorded sequences under dataset/, TTS uses the silent
+backend in a throwaway cache and Gemini is replaced by a stub that answers
+after --llm-delay-ms.
+
+Every stage runs in a fresh spawned process so its peak RSS is its own.
+Per stage it reports p50/p95/p99/mean latency per call, throughput in items
+per second (frames, windows or sentences) and peak RSS, and writes
+everything to a JSON file. Pass --compare with an earlier result to see
+the change per stage.
+
+Usage (from backend/, with the model artefacts in place):
+    python -m benchmarks.suite
+    python -m benchmarks.suite --stages model_predict_b1,streaming_step
+    python -m benchmarks.suite --compare benchmarks/results/<old>.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from types import SimpleNamespace
+
+import numpy as np
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+REGRESSION_THRESHOLD = 0.10  # relative p50 change flagged by --compare
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+
+
+def timed_calls(fn, inputs, warmup=1):
+    """Call fn on every input (after `warmup` untimed calls); returns per-call seconds"""
+    for item in inputs[:warmup]:
+        fn(item)
+    times = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def load_windows(dataset_dir, limit):
+    """Recorded (SEQ_LENGTH, features) keypoint sequences, or random ones if none are on disk"""
+    paths = sorted(glob.glob(os.path.join(dataset_dir, "*", "*.npy")))[:limit]
+    if paths:
+        return np.stack([np.load(p) for p in paths]).astype(np.float32), "dataset"
+    from utils.ml_utils import SEQ_LENGTH, INPUT_FEATURES
+    rng = np.random.default_rng(0)
+    return rng.random((limit, SEQ_LENGTH, INPUT_FEATURES), dtype=np.float32), "random"
+
+
+def load_videos(paths):
+    """(bytes, suffix) clips from --video, else synthetic ones"""
+    if paths:
+        clips = []
+        for path in paths:
+            with open(path, "rb") as f:
+                clips.append((f.read(), os.path.splitext(path)[1].lower()))
+        return clips
+    from benchmarks.decode_benchmark import make_synthetic_clip
+    return [(make_synthetic_clip(".mp4", "mp4v", frames=90), ".mp4")]
+
+
+def use_stub_llm(delay):
+    """Point interpret_text at a stand-in for the Gemini model"""
+    from utils import gemini_utils
+
+    class StubModel:
+        def generate_content(self, prompt):
+            time.sleep(delay)
+            return SimpleNamespace(text=prompt.split("'")[1].capitalize() + ".")
+
+    stub = StubModel()
+    gemini_utils.get_model = lambda: stub
+    return gemini_utils
+
+
+def sentences(n, offset=0):
+    words = ["friend", "family", "water", "home", "school", "happy", "help", "later"]
+    return [f"{words[i % 8]} {words[(i // 8) % 8]} {i + offset}" for i in range(n)]
+
+
+# --------------- STAGES ---------------
+# Each returns (per-call seconds, items per call, notes)
+
+def stage_decode(args):
+    from utils.video_utils import iter_frames
+    clips = load_videos(args.video)
+    frames = sum(1 for _ in iter_frames(*clips[0]))
+    times = timed_calls(lambda clip: sum(1 for _ in iter_frames(*clip)), clips * args.repeats)
+    return times, frames, {"frames_per_clip": frames}
+
+
+def stage_extract_keypoints(args):
+    from mediapipe_utils import NUM_FEATURES, extract_keypoints, mediapipe_process_frame
+    from utils.keypoint_utils import holistic_pool
+    from utils.video_utils import iter_frames
+    frames = [frame for clip in load_videos(args.video) for frame in iter_frames(*clip)]
+    row = np.zeros(NUM_FEATURES, dtype=np.float32)
+    with holistic_pool.session() as holistic:
+        times = timed_calls(lambda frame: extract_keypoints(mediapipe_process_frame(frame, holistic), row),
+                            frames * max(1, args.repeats // 5))
+    return times, 1, {"frames": len(frames)}
+
+
+def stage_predict_sign(args):
+    from utils.ml_utils import predict_sign
+    clips = load_videos(args.video)
+    times = timed_calls(lambda clip: predict_sign(clip[0]), clips * args.repeats)
+    return times, 1, {}
+
+
+def _model_predict(args, batch_size):
+    from utils.ml_utils import backend
+    X, source = load_windows(args.dataset, args.windows)
+    batches = [X[i:i + batch_size] for i in range(0, len(X) - batch_size + 1, batch_size)]
+    times = timed_calls(backend.predict, batches)
+    return times, batch_size, {"backend": backend.name, "inputs": source}
+
+
+def stage_model_predict_b1(args):
+    return _model_predict(args, 1)
+
+
+def stage_model_predict_b32(args):
+    return _model_predict(args, 32)
+
+
+def stage_predict_sequence(args):
+    """Through the batching scheduler, one caller at a time"""
+    from utils.ml_utils import predict_sequence
+    X, source = load_windows(args.dataset, args.windows)
+    return timed_calls(predict_sequence, list(X)), 1, {"inputs": source}
+
+
+def stage_streaming_step(args):
+    from utils.inference_backends import StreamingClassifier, supports_streaming
+    from utils.ml_utils import backend
+    if not supports_streaming(backend):
+        return None, 1, {"skipped": "needs SIGN_BACKEND=numpy"}
+    stream = StreamingClassifier(backend)
+    X, source = load_windows(args.dataset, args.windows)
+    frames = list(X.reshape(-1, X.shape[-1]))
+    return timed_calls(stream.step, frames), 1, {"inputs": source}
+
+
+def stage_segmenter_push(args):
+    from utils.segmenter import MotionSegmenter
+    X, source = load_windows(args.dataset, args.windows)
+    segmenter = MotionSegmenter(min(126, X.shape[-1]))
+    frames = list(X.reshape(-1, X.shape[-1]))
+    return timed_calls(segmenter.push, frames), 1, {"inputs": source}
+
+
+def stage_generate_tts_cold(args):
+    from utils.audio_utils import generate_tts
+    return timed_calls(generate_tts, sentences(args.sentences), warmup=0), 1, {"backend": "silent"}
+
+
+def stage_generate_tts_cached(args):
+    from utils.audio_utils import generate_tts
+    texts = sentences(args.sentences)
+    for text in texts:
+        generate_tts(text)
+    return timed_calls(generate_tts, texts), 1, {"backend": "silent"}
+
+
+def stage_interpret_text_remote(args):
+    gemini_utils = use_stub_llm(args.llm_delay_ms / 1000)
+    times = timed_calls(gemini_utils.interpret_text, sentences(args.sentences), warmup=0)
+    return times, 1, {"llm": f"stub, {args.llm_delay_ms} ms"}
+
+
+def stage_interpret_text_cached(args):
+    gemini_utils = use_stub_llm(args.llm_delay_ms / 1000)
+    texts = sentences(args.sentences)
+    for text in texts:
+        gemini_utils.interpret_text(text)
+    return timed_calls(gemini_utils.interpret_text, texts), 1, {"llm": "stub"}
+
+
+STAGES = {
+    "decode": stage_decode,
+    "extract_keypoints": stage_extract_keypoints,
+    "predict_sign": stage_predict_sign,
+    "model_predict_b1": stage_model_predict_b1,
+    "model_predict_b32": stage_model_predict_b32,
+    "predict_sequence": stage_predict_sequence,
+    "streaming_step": stage_streaming_step,
+    "segmenter_push": stage_segmenter_push,
+    "generate_tts_cold": stage_generate_tts_cold,
+    "generate_tts_cached": stage_generate_tts_cached,
+    "interpret_text_remote": stage_interpret_text_remote,
+    "interpret_text_cached": stage_interpret_text_cached,
+}
+
+
+def run_stage(name, args):
+    """Runs in a fresh process: isolates the stage's imports, caches and peak RSS"""
+    os.environ["TTS_BACKEND"] = "silent"
+    os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-tts-")
+    os.environ["INTERPRET_CACHE_FILE"] = ""
+    times, items, notes = STAGES[name](args)
+    if times is None:
+        return {"stage": name, **notes}
+    times = np.asarray(times) * 1000
+    return {
+        "stage": name,
+        "calls": len(times),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "p99_ms": float(np.percentile(times, 99)),
+        "mean_ms": float(times.mean()),
+        "throughput_per_s": float(items * len(times) / (times.sum() / 1000)),
+        "peak_rss_mb": peak_rss_mb(),
+        **notes,
+    }
+
+
+# --------------- REPORTING ---------------
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(results):
+    print(f"{'stage':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'items/s':>11}{'RSS MB':>9}")
+    for r in results:
+        if "p50_ms" not in r:
+            print(f"{r['stage']:<24} {r.get('skipped') or r.get('error')}")
+            continue
+        print(f"{r['stage']:<24}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}"
+              f"{r['throughput_per_s']:>11.1f}{r['peak_rss_mb']:>9.0f}")
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["stage"]: r for r in json.load(f)["stages"]}
+    print(f"\nvs {baseline_path}")
+    print(f"{'stage':<24}{'p50 before':>12}{'p50 after':>12}{'change':>9}")
+    for r in results:
+        old = baseline.get(r["stage"])
+        if not old or "p50_ms" not in old or "p50_ms" not in r:
+            continue
+        change = r["p50_ms"] / old["p50_ms"] - 1
+        flag = "  REGRESSION" if change > REGRESSION_THRESHOLD else ""
+        print(f"{r['stage']:<24}{old['p50_ms']:>12.3f}{r['p50_ms']:>12.3f}{change:>+9.1%}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline latency / throughput / RSS benchmarks")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of: " + ", ".join(STAGES))
+    parser.add_argument("--dataset", default="dataset", help="directory of <sign>/<seq>.npy recordings")
+    parser.add_argument("--video", action="append", help="real clip to use instead of the synthetic one (repeatable)")
+    parser.add_argument("--windows", type=int, default=256, help="keypoint windows to run through the model")
+    parser.add_argument("--sentences", type=int, default=200, help="distinct sentences for TTS / LLM stages")
+    parser.add_argument("--repeats", type=int, default=10, help="passes over the clips in video stages")
+    parser.add_argument("--llm-delay-ms", type=float, default=0.0, help="simulated Gemini round trip")
+    parser.add_argument("--out", help="result file (default benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.stages.split(","):
+        if name not in STAGES:
+            parser.error(f"unknown stage {name}")
+        print(f"[INFO] {name} ...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            try:
+                results.append(pool.submit(run_stage, name, args).result())
+            except Exception as e:
+                results.append({"stage": name, "error": f"{type(e).__name__}: {e}"})
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sign_backend": os.getenv("SIGN_BACKEND", "keras"),
+        "args": vars(args),
+        "stages": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print_table(results)
+    print(f"[INFO] Saved {out}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
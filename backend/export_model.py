@@ -0,0 +1,157 @@
+# Exports model_best.keras for the lightweight inference backends
+# (see utils/inference_backends.py), one file per precision variant:
+#   model_best.tflite / .fp16.tflite / .int8.tflite - for SIGN_BACKEND=tflite
+#   model_best.npz / .fp16.npz                      - for SIGN_BACKEND=numpy
+# Pick one at serving time with SIGN_MODEL_VARIANT=float32|float16|int8.
+# int8 is full integer quantization calibrated on X_train.npy: int8-only builtin
+# ops with int8 input and output tensors (TFLiteBackend quantizes the input
+# and dequantizes the output), so it is TFLite only. Afterwards each
+# variant's accuracy delta on X_val/y_val, file size and per-window CPU
+# latency are reported.
+# Usage: python export_model.py [--model model_best.keras] [--variants float32,float16,int8]
+import argparse
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from utils.inference_backends import (
+    KerasBackend, NumpyBackend, TFLiteBackend, apply_normalization, export_numpy_weights, load_normalization,
+    variant_path,
+)
+
+CALIBRATION_SAMPLES = 200  # X_train windows used to calibrate int8 ranges
+
+
+def unrolled(model):
+    """Copy of a Sequential model with its LSTMs unrolled over the fixed window.
+
+    The TFLite calibrator can't step through the WHILE loop a rolled LSTM
+    lowers to; unrolled, every timestep is plain ops it can quantize.
+    """
+    def clone(layer):
+        config = layer.get_config()
+        if isinstance(layer, tf.keras.layers.LSTM):
+            config["unroll"] = True
+        return layer.__class__.from_config(config)
+
+    copy = tf.keras.models.clone_model(model, clone_function=clone)
+    copy.set_weights(model.get_weights())
+    return copy
+
+
+def export_tflite(model, path, optimizations=None, representative_dataset=None, supported_types=None,
+                  supported_ops=None, io_type=None):
+    """Convert a Keras model to a .tflite flatbuffer"""
+    # A fixed batch of 1 lets the LSTMs lower to builtin ops (no Flex
+    # TensorList ops); TFLiteBackend feeds batches one window at a time.
+    inputs = tf.keras.Input(model.input_shape[1:], batch_size=1)
+    fixed = tf.keras.Model(inputs, model(inputs))
+    converter = tf.lite.TFLiteConverter.from_keras_model(fixed)
+    if optimizations:
+        converter.optimizations = optimizations
+    if representative_dataset is not None:
+        converter.representative_dataset = representative_dataset
+    if supported_types:
+        converter.target_spec.supported_types = supported_types
+    if supported_ops:
+        converter.target_spec.supported_ops = supported_ops
+    if io_type is not None:
+        converter.inference_input_type = io_type
+        converter.inference_output_type = io_type
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+    return path
+
+
+def calibration_windows(x_path, stats, samples=CALIBRATION_SAMPLES):
+    """Representative dataset: evenly spaced training windows, normalized as at inference"""
+    X = np.load(x_path, mmap_mode="r")
+    picks = np.linspace(0, len(X) - 1, min(samples, len(X))).astype(int)
+
+    def generate():
+        for i in picks:
+            window = np.asarray(X[i], dtype=np.float32)
+            if stats is not None:
+                window = (window - stats[0]) / stats[1]
+            yield [window[None]]
+    return generate
+
+
+def latency_ms(backend, X, repeats=50):
+    """Median single-window latency"""
+    backend.predict(X[:1])
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        backend.predict(X[i % len(X)][None])
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def report(model_path, artefacts, x_path, y_path):
+    """Accuracy delta vs Keras, file size and latency for every exported variant"""
+    X = np.load(x_path).astype(np.float32)
+    y = np.argmax(np.load(y_path), axis=1)
+    stats = load_normalization(os.path.splitext(model_path)[0] + ".norm.npz")
+    reference = apply_normalization(KerasBackend(model_path), stats)
+    ref_probs = reference.predict(X)
+    ref_acc = float((ref_probs.argmax(1) == y).mean())
+
+    print(f"\n{'variant':<18}{'size KB':>9}{'val acc':>9}{'delta':>8}{'max |dp|':>10}{'ms/window':>11}")
+    print(f"{'keras float32':<18}{os.path.getsize(model_path) / 1024:>9.0f}{ref_acc:>9.3f}{0:>+8.3f}{0:>10.1e}"
+          f"{latency_ms(reference, X):>11.3f}")
+    for label, (backend_cls, path) in artefacts.items():
+        backend = apply_normalization(backend_cls(path), stats)
+        probs = backend.predict(X)
+        acc = float((probs.argmax(1) == y).mean())
+        print(f"{label:<18}{os.path.getsize(path) / 1024:>9.0f}{acc:>9.3f}{acc - ref_acc:>+8.3f}"
+              f"{float(np.abs(probs - ref_probs).max()):>10.1e}{latency_ms(backend, X):>11.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model_best.keras for the TFLite and NumPy backends")
+    parser.add_argument("--model", default="model_best.keras")
+    parser.add_argument("--variants", default="float32,float16,int8", help="comma-separated: float32, float16, int8")
+    parser.add_argument("--calibration", default="X_train.npy", help="windows used to calibrate int8")
+    parser.add_argument("--x", default="X_val.npy")
+    parser.add_argument("--y", default="y_val.npy")
+    parser.add_argument("--no-report", action="store_true", help="skip the accuracy / size / latency report")
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    stem = os.path.splitext(args.model)[0]
+    stats = load_normalization(stem + ".norm.npz")
+    artefacts = {}
+
+    for variant in args.variants.split(","):
+        tflite_path = variant_path(stem + ".tflite", variant)
+        if variant == "float32":
+            export_tflite(model, tflite_path)
+            npz_path = export_numpy_weights(model, stem + ".npz")
+        elif variant == "float16":
+            export_tflite(model, tflite_path, [tf.lite.Optimize.DEFAULT], supported_types=[tf.float16])
+            npz_path = export_numpy_weights(model, variant_path(stem + ".npz", variant), dtype=np.float16)
+        elif variant == "int8":
+            if not os.path.exists(args.calibration):
+                print(f"[WARNING] Skipping int8: calibration data {args.calibration} not found")
+                continue
+            export_tflite(unrolled(model), tflite_path, [tf.lite.Optimize.DEFAULT],
+                          representative_dataset=calibration_windows(args.calibration, stats),
+                          supported_ops=[tf.lite.OpsSet.TFLITE_BUILTINS_INT8], io_type=tf.int8)
+            npz_path = None  # NumpyBackend computes in float32; int8 is TFLite only
+        else:
+            parser.error(f"unknown variant {variant}")
+        artefacts[f"tflite {variant}"] = (TFLiteBackend, tflite_path)
+        print(f"[INFO] Saved {tflite_path} ({os.path.getsize(tflite_path) / 1024:.0f} KB)")
+        if npz_path:
+            artefacts[f"numpy {variant}"] = (NumpyBackend, npz_path)
+            print(f"[INFO] Saved {npz_path} ({os.path.getsize(npz_path) / 1024:.0f} KB)")
+
+    if not args.no_report and os.path.exists(args.x) and os.path.exists(args.y):
+        report(args.model, artefacts, args.x, args.y)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+# Multi-worker serving: gunicorn -c gunicorn.conf.py app:app
+# With preload_app the master imports app.py - and with it the sign model -
+# once, and workers fork from it sharing the weights copy-on-write instead of
+# each loading their own. MediaPipe, Gemini and gTTS are imported lazily, so
+# the master holds none of them; keypoint workers and thread pools are created
+# per worker at startup. TensorFlow hangs when used in a forked child, so with
+# SIGN_BACKEND=keras every worker loads the model itself; export the numpy or
+# tflite variant (export_model.py) to share one copy.
+# Each worker answers GET /ready with 200 once it has run a warm-up inference.
+# GET /metrics is per worker too: samples are labelled worker="<pid>" and a
+# scrape sees the worker that accepted it (see utils/metrics.py).
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_WORKERS", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("SIGN_BACKEND", "keras") != "keras"
+timeout = 120
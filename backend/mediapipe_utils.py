@@ -4,6 +4,9 @@
 # For each landmark we take x,y,z -> total features = (33+21+21)*3 = 75*3 = 225
 # If you include face, the features grow; to keep it light we keep these three groups.
 
+from itertools import chain, islice
+from operator import attrgetter
+
 import mediapipe as mp
 import numpy as np
 import cv2
@@ -22,31 +25,37 @@ mp_drawing = mp.solutions.drawing_utils
 
 NUM_FEATURES = (33*4) + (21*3*2) + (468*3)
 
-def extract_keypoints(results):
-    """Extract and flatten all landmarks into a feature vector"""
-    pose = np.array([[res.x, res.y, res.z, res.visibility] 
-                     for res in results.pose_landmarks.landmark]).flatten() \
-           if results.pose_landmarks else np.zeros(33*4)
-    
-    if results.face_landmarks:
-        face = np.array([[lm.x, lm.y, lm.z]
-                         for lm in results.face_landmarks.landmark]).flatten()
-        if face.shape[0] > 468 * 3:
-            face = face[:468 * 3]            # crop extras
-        elif face.shape[0] < 468 * 3:
-            face = np.pad(face, (0, 468 * 3 - face.shape[0]))
-    else:
-        face = np.zeros(468 * 3)
-    
-    left_hand = np.array([[res.x, res.y, res.z] 
-                          for res in results.left_hand_landmarks.landmark]).flatten() \
-                if results.left_hand_landmarks else np.zeros(21*3)
-    
-    right_hand = np.array([[res.x, res.y, res.z] 
-                           for res in results.right_hand_landmarks.landmark]).flatten() \
-                 if results.right_hand_landmarks else np.zeros(21*3)
-    
-    return np.concatenate([pose, face, left_hand, right_hand])
+# Layout of one keypoint frame: pose (x,y,z,visibility) | face | left hand | right hand (x,y,z)
+POSE_SLICE = slice(0, 33*4)
+FACE_SLICE = slice(POSE_SLICE.stop, POSE_SLICE.stop + 468*3)
+LEFT_HAND_SLICE = slice(FACE_SLICE.stop, FACE_SLICE.stop + 21*3)
+RIGHT_HAND_SLICE = slice(LEFT_HAND_SLICE.stop, LEFT_HAND_SLICE.stop + 21*3)
+
+def _write_landmarks(landmark_list, dst, fields):
+    """Copy `fields` of each landmark into dst (a slice of the output frame), zero-filling the rest"""
+    count = dst.shape[0] // len(fields)
+    view = dst.reshape(count, len(fields))
+    n = min(len(landmark_list.landmark), count) if landmark_list is not None else 0
+    if n:
+        # straight from the landmark attributes into one float32 block, no Python list in between
+        values = chain.from_iterable(map(attrgetter(*fields), islice(landmark_list.landmark, n)))
+        view[:n].reshape(-1)[:] = np.fromiter(values, np.float32, n * len(fields))
+    view[n:] = 0
+
+def extract_keypoints(results, out=None):
+    """Extract and flatten all landmarks into a feature vector.
+
+    Writes into `out` (a float32 row of NUM_FEATURES, e.g. one row of a
+    session buffer) when given, and returns it. Extra face landmarks from
+    refine_face_landmarks are cropped; missing groups are zeros.
+    """
+    if out is None:
+        out = np.zeros(NUM_FEATURES, dtype=np.float32)
+    _write_landmarks(results.pose_landmarks, out[POSE_SLICE], ("x", "y", "z", "visibility"))
+    _write_landmarks(results.face_landmarks, out[FACE_SLICE], ("x", "y", "z"))
+    _write_landmarks(results.left_hand_landmarks, out[LEFT_HAND_SLICE], ("x", "y", "z"))
+    _write_landmarks(results.right_hand_landmarks, out[RIGHT_HAND_SLICE], ("x", "y", "z"))
+    return out
 
 def mediapipe_process_frame(image, holistic):
     """Process frame through MediaPipe Holistic"""
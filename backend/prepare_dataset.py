@@ -1,81 +1,74 @@
-# This script loads the recorded .npy sequences and creates X.npy, y.npy for training
-import numpy as np
+# This script loads the recorded sequences and creates X.npy, y.npy for training
+# Recordings are synced incrementally into a packed shard (utils/shard_utils.py):
+# only new or changed .npy files are read, so a rebuild after a recording
+# session takes seconds.
+# Usage: python prepare_dataset.py [--pack] [--workers N]
+import argparse
 import json
 import os
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from tensorflow.keras.utils import to_categorical
 
-DATA_DIR = "dataset"
-SEQ_LENGTH = 8  # Number of frames per sequence
-seq_lengths=[]
-for action in os.listdir(DATA_DIR):
-    action_dir = os.path.join(DATA_DIR, action)
-    if not os.path.isdir(action_dir):
-        continue
-    for seq_file in os.listdir(action_dir):
-        if seq_file.endswith('.npy'):
-            seq_data = np.load(os.path.join(action_dir, seq_file))
-            seq_lengths.append(seq_data.shape[0])
+import numpy as np
 
-if seq_lengths:
-    # choose median to avoid extremes
-    SEQ_LENGTH = int(np.median(seq_lengths))
-    print(f"[INFO] Auto-detected SEQ_LENGTH = {SEQ_LENGTH}")
-else:
-    SEQ_LENGTH = SEQ_LENGTH
-    print(f"[WARNING] No sequences found — using default SEQ_LENGTH = {SEQ_LENGTH}")
+from utils.shard_utils import SHARD_DIR, Shard, export_windows, live_records, load_manifest, pack_directory, \
+    stable_split, sync_directory
 
-# step 2
-labels = []
-X = []
+DATA_DIR = "dataset"
+SEQ_LENGTH = 8  # Number of frames per sequence
+VAL_FRACTION = 0.15
 
-actions = sorted(os.listdir(DATA_DIR))
-for action in actions:
-    action_dir = os.path.join(DATA_DIR, action)
-    if not os.path.isdir(action_dir):
-        continue
-    for file in sorted(os.listdir(action_dir)):
-        if not file.endswith('.npy'):
-            continue
-        seq = np.load(os.path.join(action_dir, file))  # shape: (frames, features)
 
-        # pad or truncate to SEQ_LENGTH
-        if seq.shape[0] != SEQ_LENGTH:
-            if seq.shape[0] < SEQ_LENGTH:
-                pad = np.zeros((SEQ_LENGTH - seq.shape[0], seq.shape[1]), dtype=np.float32)
-                seq = np.vstack([seq, pad])
-            else:
-                seq = seq[:SEQ_LENGTH]
+def main():
+    parser = argparse.ArgumentParser(description="Build X_*.npy / y_*.npy from the recorded sequences")
+    parser.add_argument("--pack", action="store_true", help="rebuild the shard from scratch")
+    parser.add_argument("--workers", type=int, default=None, help="processes for loading and padding")
+    args = parser.parse_args()
 
-        X.append(seq)
-        labels.append(action)
+    # step 1: bring the shard up to date with DATA_DIR
+    if args.pack:
+        packed = pack_directory(DATA_DIR, SHARD_DIR, args.workers)
+        print(f"[INFO] Packed {packed} sequences from {DATA_DIR} into {SHARD_DIR}")
+    elif os.path.isdir(DATA_DIR):
+        counts = sync_directory(DATA_DIR, SHARD_DIR, args.workers)
+        print("[INFO] Synced {DATA_DIR}: {added} added, {changed} changed, {removed} removed, "
+              "{unchanged} unchanged".format(DATA_DIR=DATA_DIR, **counts))
+    if not os.path.exists(os.path.join(SHARD_DIR, "meta.json")):
+        print(f"[WARNING] No sequences found in {DATA_DIR} or {SHARD_DIR}")
+        return
+    shard = Shard(SHARD_DIR)
+    manifest = load_manifest(SHARD_DIR)
+    records = live_records(SHARD_DIR, manifest)
 
-X = np.array(X)
-labels = np.array(labels)
+    seq_length = SEQ_LENGTH
+    if len(records):
+        # choose median to avoid extremes
+        seq_length = int(np.median(shard.lengths[records]))
+        print(f"[INFO] Auto-detected SEQ_LENGTH = {seq_length}")
+    else:
+        print(f"[WARNING] No sequences found — using default SEQ_LENGTH = {seq_length}")
 
-# step 3
-le = LabelEncoder()
-y = le.fit_transform(labels)
+    # step 2: label encoding (sorted sign names, as LabelEncoder did)
+    actions = np.array(shard.labels)[shard.label_ids[records]]
+    classes = sorted(set(actions))
+    mapping = {int(i): str(c) for i, c in enumerate(classes)}
+    os.makedirs('server', exist_ok=True)
+    with open('server/mapping.json', 'w') as f:
+        json.dump(mapping, f)
+    class_ids = {c: i for i, c in enumerate(classes)}
+    y = np.array([class_ids[a] for a in actions], dtype=np.int64)
+    y_onehot = np.eye(len(classes), dtype=np.float32)[y]
 
-mapping = {int(i): str(c) for i, c in enumerate(le.classes_)}
-os.makedirs('server', exist_ok=True)
-with open('server/mapping.json', 'w') as f:
-    json.dump(mapping, f)
+    # step 3: stratified split ordered by content hash, so adding recordings barely reshuffles existing ones
+    is_val = stable_split([manifest["hashes"][r] for r in records], y, VAL_FRACTION)
 
-# Step 4: Prepare one-hot encoded targets and split data
-num_classes = len(le.classes_)
-y_onehot = to_categorical(y, num_classes=num_classes)
+    # step 4: pad / truncate straight from the memory map into preallocated outputs
+    export_windows(SHARD_DIR, records[~is_val], 'X_train.npy', seq_length, args.workers)
+    export_windows(SHARD_DIR, records[is_val], 'X_val.npy', seq_length, args.workers)
+    np.save('y_train.npy', y_onehot[~is_val])
+    np.save('y_val.npy', y_onehot[is_val])
 
-X_train, X_val, y_train, y_val = train_test_split(
-    X, y_onehot, test_size=0.15, random_state=42, stratify=y
-)
+    print(f'Saved arrays: X_train.npy ({int((~is_val).sum())}), X_val.npy ({int(is_val.sum())}), y_train.npy, y_val.npy')
+    print(f'Number of classes: {len(classes)}, SEQ_LENGTH used: {seq_length}')
 
-#  Step 5: Save results
-np.save('X_train.npy', X_train)
-np.save('X_val.npy', X_val)
-np.save('y_train.npy', y_train)
-np.save('y_val.npy', y_val)
 
-print(f'Saved arrays: X_train.npy, X_val.npy, y_train.npy, y_val.npy')
-print(f'Number of classes: {num_classes}, SEQ_LENGTH used: {SEQ_LENGTH}')
\ No newline at end of file
+if __name__ == "__main__":
+    main()
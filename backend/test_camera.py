@@ -1,53 +1,39 @@
+import os
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
 import mediapipe as mp
 import json
+from mediapipe_utils import extract_keypoints
+from utils.inference_backends import NUMPY_WEIGHTS_PATH, STREAMING_INFERENCE, NumpyBackend, StreamingClassifier, \
+    apply_normalization, load_normalization
 
 # --- Load model and mapping ---
-model = load_model("model_best.keras")
+norm_stats = load_normalization()  # training-time input standardization, if saved
 with open("server/mapping.json", "r") as f:
     mapping = json.load(f)
 
-SEQ_LENGTH = model.input_shape[1]  # 30
-NUM_FEATURES = model.input_shape[2]  # 1662
+if STREAMING_INFERENCE and os.path.exists(NUMPY_WEIGHTS_PATH):
+    # Keep LSTM state and advance it one step per frame (see export_model.py)
+    model = None
+    stream = StreamingClassifier(apply_normalization(NumpyBackend(NUMPY_WEIGHTS_PATH), norm_stats))
+    SEQ_LENGTH, NUM_FEATURES = stream.backend.input_shape  # 30, 1662
+else:
+    # Re-run the whole window on every frame
+    from tensorflow.keras.models import load_model
+    model = load_model("model_best.keras")
+    stream = None
+    SEQ_LENGTH = model.input_shape[1]  # 30
+    NUM_FEATURES = model.input_shape[2]  # 1662
 
 mp_holistic = mp.solutions.holistic
 mp_drawing = mp.solutions.drawing_utils
 
-# --- Your fixed extract_keypoints() function ---
-def extract_keypoints(results):
-   # Pose (33 landmarks, each has x, y, z, visibility)
-    pose = np.array([[res.x, res.y, res.z, res.visibility] 
-                     for res in results.pose_landmarks.landmark]) if results.pose_landmarks else np.zeros((33, 4))
-    
-    # Face (468 landmarks, each has x, y, z)
-    face = np.array([[res.x, res.y, res.z] 
-                     for res in results.face_landmarks.landmark]) if results.face_landmarks else np.zeros((468, 3))
-    
-    # Left hand (21 landmarks, each has x, y, z)
-    lh = np.array([[res.x, res.y, res.z] 
-                   for res in results.left_hand_landmarks.landmark]) if results.left_hand_landmarks else np.zeros((21, 3))
-    
-    # Right hand (21 landmarks, each has x, y, z)
-    rh = np.array([[res.x, res.y, res.z] 
-                   for res in results.right_hand_landmarks.landmark]) if results.right_hand_landmarks else np.zeros((21, 3))
-
-    # Flatten and concatenate
-    feature_vector = np.concatenate([
-        pose.flatten(), 
-        face.flatten(), 
-        lh.flatten(), 
-        rh.flatten()
-    ])
-    
-    print("Feature vector length:", feature_vector.shape[0])  # Debug
-    return feature_vector
-
-
 # --- Start Camera ---
 cap = cv2.VideoCapture(0)
-sequence = []
+# Rolling window of the last SEQ_LENGTH frames, written in place
+sequence = np.zeros((SEQ_LENGTH, NUM_FEATURES), dtype=np.float32)
+frames_seen = 0
+print("[INFO] Inference:", "streaming (numpy)" if stream is not None else "windowed (keras)")
 
 with mp_holistic.Holistic(
     min_detection_confidence=0.5,
@@ -68,16 +54,30 @@ with mp_holistic.Holistic(
         mp_drawing.draw_landmarks(image, results.left_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
         mp_drawing.draw_landmarks(image, results.right_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
 
-        # Extract keypoints
-        keypoints = extract_keypoints(results)
-        print("Feature vector length:", keypoints.shape[0])
-        sequence.append(keypoints)
-        sequence = sequence[-SEQ_LENGTH:]  # keep only last 30 frames
-
-        # When we have 30 frames -> predict
-        if len(sequence) == SEQ_LENGTH:
+        # Extract keypoints straight into the newest row (the stream only needs that row)
+        if stream is None:
+            sequence[:-1] = sequence[1:]
+        extract_keypoints(results, sequence[-1])
+        frames_seen += 1
+
+        preds = None
+        if stream is not None:
+            if results.left_hand_landmarks or results.right_hand_landmarks:
+                # One LSTM step for the new frame
+                probs = stream.step(sequence[-1])
+                if stream.ready:
+                    preds = probs
+            else:
+                # No hands: segment boundary, start from a zero state
+                stream.reset()
+        elif frames_seen >= SEQ_LENGTH:
+            # When we have 30 frames -> predict
             X = np.expand_dims(sequence, axis=0)  # (1, 30, 1662)
+            if norm_stats is not None:
+                X = (X - norm_stats[0]) / norm_stats[1]
             preds = model.predict(X, verbose=0)[0]
+
+        if preds is not None:
             label = np.argmax(preds)
             confidence = np.max(preds)
 
@@ -0,0 +1,146 @@
+# utils/asset_bundle.py
+# All sign assets concatenated into one file plus an offset index, so a client
+# can preload the whole vocabulary in one request or fetch single signs with
+# HTTP Range requests against a single cached URL:
+#   index   {"version", "size", "assets": {"HELLO.gif": {"offset", "length", "type"}, ...}}
+#   bundle  the asset bytes back to back, in index order
+# The bundle is rebuilt when a file under the asset directory is added,
+# removed or modified (checked at most every ASSET_BUNDLE_CHECK_SECONDS).
+# Its version is a content hash, which is also the strong ETag.
+import fnmatch
+import hashlib
+import mimetypes
+import mmap
+import os
+import re
+import tempfile
+import threading
+import time
+
+from utils.phrase_index import SIGN_GIF_DIR
+
+ASSET_BUNDLE_FILE = os.getenv("ASSET_BUNDLE_FILE", "sign_bundle.bin")
+# comma-separated patterns, relative to the asset directory; e.g. "*.gif,variants/*/160.webm"
+ASSET_BUNDLE_PATTERNS = os.getenv("ASSET_BUNDLE_PATTERNS", "*.gif").split(",")
+ASSET_BUNDLE_CHECK_SECONDS = float(os.getenv("ASSET_BUNDLE_CHECK_SECONDS", 2))
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class BundleSnapshot:
+    """One built bundle: its index, ETag and an mmap of its bytes"""
+
+    def __init__(self, version, index, data):
+        self.version = version
+        self.etag = f'"{version}"'
+        self.index = index
+        self.data = data
+        self.size = len(data)
+
+    def iter_bytes(self, start, end, chunk=256 * 1024):
+        """The bytes in [start, end) in chunks, for a streaming response"""
+        for offset in range(start, end, chunk):
+            yield self.data[offset:min(offset + chunk, end)]
+
+
+def parse_range(header, size):
+    """(start, end) half-open for a single-range "bytes=..." header.
+
+    None when the header should be ignored (absent, malformed - e.g. a
+    last byte before the first - or multi-range: the full body is served,
+    RFC 9110 14.2); raises ValueError when the range can't be satisfied (416).
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)  # suffix range: the last N bytes
+        if length == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"range starts past {size} bytes")
+    end = min(int(last) + 1, size) if last else size
+    return start, end
+
+
+class AssetBundle:
+    """Lazily built, self-refreshing bundle of the files under `directory` that match `patterns`"""
+
+    def __init__(self, directory=SIGN_GIF_DIR, path=ASSET_BUNDLE_FILE, patterns=ASSET_BUNDLE_PATTERNS,
+                 check_seconds=ASSET_BUNDLE_CHECK_SECONDS):
+        self.directory = directory
+        self.path = path
+        self.patterns = [p.strip() for p in patterns if p.strip()]
+        self.check_seconds = check_seconds
+        self._snapshot = None
+        self._fingerprint = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _scan(self):
+        """Sorted [(relative path, size, mtime_ns)] of the matching files"""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                full = os.path.join(root, name)
+                rel = os.path.relpath(full, self.directory).replace(os.sep, "/")
+                if any(fnmatch.fnmatch(rel, p) for p in self.patterns):
+                    stat = os.stat(full)
+                    files.append((rel, stat.st_size, stat.st_mtime_ns))
+        return sorted(files)
+
+    def _build(self, files):
+        assets = {}
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".bin")
+        offset = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for rel, _, _ in files:
+                    with open(os.path.join(self.directory, rel), "rb") as f:
+                        data = f.read()
+                    out.write(data)
+                    digest.update(rel.encode() + b"\0" + data)
+                    assets[rel] = {
+                        "offset": offset,
+                        "length": len(data),
+                        "type": mimetypes.guess_type(rel)[0] or "application/octet-stream",
+                    }
+                    offset += len(data)
+        except OSError:
+            # e.g. a file removed mid-build; the next request scans again
+            os.unlink(tmp_path)
+            raise
+        # readers keep their mmap of the previous file after the replace
+        os.replace(tmp_path, self.path)
+        version = digest.hexdigest()[:20]
+        with open(self.path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if offset else b""
+        self.builds += 1
+        print(f"[INFO] Built sign bundle {version}: {len(assets)} assets, {offset / 1e6:.1f} MB")
+        return BundleSnapshot(version, {"version": version, "size": offset, "assets": assets}, data)
+
+    def current(self):
+        """The up-to-date snapshot, rebuilding first if the directory changed"""
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked < self.check_seconds:
+            return self._snapshot
+        with self._lock:
+            if self._snapshot is None or now - self._checked >= self.check_seconds:
+                files = self._scan()  # a missing directory is an empty bundle
+                if files != self._fingerprint or self._snapshot is None:
+                    self._snapshot = self._build(files)
+                    self._fingerprint = files
+                self._checked = time.monotonic()
+            return self._snapshot
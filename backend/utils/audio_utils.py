@@ -1,19 +1,350 @@
 import os
-from gtts import gTTS
+import json
+import time
+import wave
+import hashlib
 import tempfile
-import speech_recognition as sr
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no gunicorn workers, one process owns the cache
+    fcntl = None
+
+from utils.metrics import STAGE_SECONDS
+
+TTS_DIR = os.getenv("TTS_CACHE_DIR", "tts")
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+TTS_LANG = os.getenv("TTS_LANG", "en")
+TTS_VOICE = os.getenv("TTS_VOICE", "com")  # gTTS top-level domain, picks the accent
+TTS_CACHE_MAX_BYTES = int(float(os.getenv("TTS_CACHE_MAX_MB", 200)) * 1024 * 1024)
+TTS_CACHE_MAX_AGE = float(os.getenv("TTS_CACHE_MAX_AGE_DAYS", 30)) * 24 * 3600
+TTS_TRACKED_SENTENCES = 1000  # request counts kept for pre-warming
+TTS_ORPHAN_SECONDS = 3600  # unindexed files older than this are swept at startup
+
+
+# --------------- SYNTHESIS BACKENDS ---------------
+
+class GTTSBackend:
+    """Google Translate TTS (network)"""
+    name = "gtts"
+    extension = ".mp3"
+
+    def synthesize(self, text, lang, voice, path):
+        from gtts import gTTS
+        gTTS(text, lang=lang, tld=voice).save(path)
+
+
+class Pyttsx3Backend:
+    """Local offline engine (espeak / SAPI / NSSpeech via pyttsx3)"""
+    name = "pyttsx3"
+    extension = ".wav"
+
+    def __init__(self):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        self._lock = threading.Lock()  # one engine, one utterance at a time
+
+    def synthesize(self, text, lang, voice, path):
+        with self._lock:
+            self.engine.save_to_file(text, path)
+            self.engine.runAndWait()
+
+
+class SilentBackend:
+    """Stub that writes a short silent WAV; no network, for tests and benchmarks"""
+    name = "silent"
+    extension = ".wav"
+
+    def synthesize(self, text, lang, voice, path):
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(8000)
+            w.writeframes(b"\x00\x00" * 800)
+
+
+TTS_BACKENDS = {
+    "gtts": GTTSBackend,
+    "pyttsx3": Pyttsx3Backend,
+    "silent": SilentBackend,
+}
+
+
+# --------------- CACHE ---------------
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.strip().lower().split())
+
+
+@contextmanager
+def _file_lock(path, blocking=True):
+    """Exclusive lock on `path` across processes (e.g. gunicorn workers).
+
+    Yields False instead of waiting when `blocking` is off and another
+    process holds it.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class TTSCache:
+    """Content-addressed on-disk cache of synthesised audio.
+
+    Files are named by a hash of (normalized text, voice, language, backend),
+    so a sentence is only synthesised once. An index (index.json in the cache
+    directory) keeps LRU order, sizes and per-sentence request counts; entries
+    older than `max_age` seconds are dropped, then least recently used ones
+    until the cache fits in `max_bytes`. Request counts outlive eviction so
+    frequent sentences can be synthesised again at startup.
+
+    Several worker processes can share one cache directory: the index is
+    merged with the copy on disk under a file lock before it is written,
+    and eviction runs on the merged index, so the size limit covers every
+    worker's files.
+    """
+
+    def __init__(self, backend, cache_dir=TTS_DIR, max_bytes=TTS_CACHE_MAX_BYTES,
+                 max_age=TTS_CACHE_MAX_AGE, lang=TTS_LANG, voice=TTS_VOICE):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.lang = lang
+        self.voice = voice
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock_path = os.path.join(cache_dir, "index.lock")
+        self.entries = OrderedDict()  # key -> {"file", "text", "size", "created", "last_used"}
+        self.requests = {}  # normalized text -> times requested
+        self._new_requests = {}  # requests since the last save, added to the on-disk counts
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def key(self, text):
+        raw = "\0".join([normalize_text(text), self.voice, self.lang, self.backend.name])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _set_entries(self, entries):
+        """Replace the in-memory index with `entries` whose files still exist, oldest use first"""
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        for key, entry in sorted(entries.items(), key=lambda kv: kv[1]["last_used"]):
+            if os.path.exists(os.path.join(self.cache_dir, entry["file"])):
+                self.entries[key] = entry
+                self.total_bytes += entry["size"]
+
+    def _load_index(self):
+        with _file_lock(self.lock_path):
+            saved = self._read_index()
+            self.requests = saved.get("requests", {})
+            self._set_entries(saved.get("entries", {}))
+            self._sweep_orphans(time.time())
+
+    def _sweep_orphans(self, now):
+        """Delete old files no index entry points at (left by a crash between synthesis and save)"""
+        indexed = {entry["file"] for entry in self.entries.values()}
+        for entry in os.scandir(self.cache_dir):
+            if (entry.is_file() and entry.name.endswith((".mp3", ".wav")) and entry.name not in indexed
+                    and now - entry.stat().st_mtime > TTS_ORPHAN_SECONDS):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def _save_index(self):
+        """Merge with index.json as other workers left it, evict, and write it back"""
+        with _file_lock(self.lock_path):
+            saved = self._read_index()
+            entries = saved.get("entries", {})
+            for key, entry in self.entries.items():
+                if key not in entries or entry["last_used"] >= entries[key]["last_used"]:
+                    entries[key] = entry
+            self._set_entries(entries)
+            self._evict(time.time())
+
+            requests = saved.get("requests", {})
+            for text, count in self._new_requests.items():
+                requests[text] = requests.get(text, 0) + count
+            self._new_requests = {}
+            top = sorted(requests.items(), key=lambda kv: kv[1], reverse=True)
+            self.requests = dict(top[:TTS_TRACKED_SENTENCES])
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".json")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"entries": self.entries, "requests": self.requests}, f)
+            os.replace(tmp_path, self.index_path)
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["size"]
+        try:
+            os.remove(os.path.join(self.cache_dir, entry["file"]))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, now):
+        for key in [k for k, e in self.entries.items() if now - e["created"] > self.max_age]:
+            self._drop(key)
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            self._drop(next(iter(self.entries)))
+
+    def _lookup(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        path = os.path.join(self.cache_dir, entry["file"])
+        if now - entry["created"] > self.max_age or not os.path.exists(path):
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        entry["last_used"] = now
+        self.hits += 1
+        return path
+
+    def get(self, text, record=True):
+        """Path of the audio for `text`, synthesising it on a miss.
+
+        `record=False` leaves the request counts alone (used by prewarm).
+        """
+        key = self.key(text)
+        with self._lock:
+            if record:
+                normalized = normalize_text(text)
+                self.requests[normalized] = self.requests.get(normalized, 0) + 1
+                self._new_requests[normalized] = self._new_requests.get(normalized, 0) + 1
+            path = self._lookup(key, time.time())
+            if path is not None:
+                return path
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # one synthesis per key; concurrent requests for it wait and then hit
+        with key_lock:
+            with self._lock:
+                path = self._lookup(key, time.time())
+                if path is not None:
+                    return path
+            file_name = key[:32] + self.backend.extension
+            path = os.path.join(self.cache_dir, file_name)
+            now = time.time()
+            try:
+                # another worker may have synthesised it since this one read the index
+                created = os.path.getmtime(path)
+                shared = now - created <= self.max_age
+            except FileNotFoundError:
+                shared = False
+            if not shared:
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=self.backend.extension)
+                os.close(fd)
+                try:
+                    with STAGE_SECONDS.labels("tts").time():
+                        self.backend.synthesize(text, self.lang, self.voice, tmp_path)
+                    os.replace(tmp_path, path)
+                except Exception:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                now = created = time.time()
+            with self._lock:
+                if shared:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                self.entries[key] = {
+                    "file": file_name,
+                    "text": normalize_text(text),
+                    "size": os.path.getsize(path),
+                    "created": created,
+                    "last_used": now,
+                }
+                self.total_bytes += self.entries[key]["size"]
+                self._save_index()
+                self._key_locks.pop(key, None)
+        return path
+
+    def most_frequent(self, n):
+        """The `n` most requested sentences, cached or not"""
+        with self._lock:
+            ranked = sorted(self.requests.items(), key=lambda kv: kv[1], reverse=True)
+        return [text for text, _ in ranked[:n]]
+
+    def prewarm(self, texts):
+        """Synthesise every text not cached yet; returns how many were synthesised.
+
+        Only one process prewarms a cache directory at a time; returns None
+        if another one already is.
+        """
+        with _file_lock(os.path.join(self.cache_dir, "prewarm.lock"), blocking=False) as owner:
+            if not owner:
+                return None
+            return self._prewarm(texts)
+
+    def _prewarm(self, texts):
+        synthesised = 0
+        for text in texts:
+            if not text or not text.strip():
+                continue
+            key = self.key(text)
+            with self._lock:
+                if self._lookup(key, time.time()) is not None:
+                    continue
+            try:
+                self.get(text, record=False)
+                synthesised += 1
+            except Exception as e:
+                print("TTS prewarm error:", text, e)
+        return synthesised
+
+    def flush(self):
+        """Persist LRU order and request counts (cache hits alone don't rewrite the index)"""
+        with self._lock:
+            self._save_index()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+tts_cache = TTSCache(TTS_BACKENDS[TTS_BACKEND]())
+
 
 def generate_tts(text: str):
-    """Generate speech for given text and save as MP3"""
-    os.makedirs("tts", exist_ok=True)
-    safe_name = "_".join(text.strip().split())
-    output_path = f"tts/{safe_name}.mp3"
-    tts = gTTS(text)
-    tts.save(output_path)
-    return output_path
+    """Return the path of an audio file speaking `text`, cached by content"""
+    return tts_cache.get(text)
+
 
 def speech_to_text(file):
     """Speech-to-text using SpeechRecognition (optional backend STT)"""
+    import speech_recognition as sr
     recognizer = sr.Recognizer()
     with sr.AudioFile(file.file) as source:
         audio_data = recognizer.record(source)
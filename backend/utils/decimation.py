@@ -0,0 +1,95 @@
+# utils/decimation.py
+# Adaptive frame decimation for video sessions. Two independent knobs:
+#   FrameDecimator  (keypoint worker) skips frames that barely differ from the
+#                   last one MediaPipe saw, and honours a minimum stride
+#   RateController  (server) raises that stride while the session's keypoint
+#                   lane is backed up and lowers it again once it drains
+# A skipped frame repeats the previous keypoints, so sequences keep one row
+# per source frame and segment / pause lengths stay in real frames.
+import os
+
+import numpy as np
+
+PIXEL_STEP = int(os.getenv("DECIMATE_PIXEL_STEP", 8))                   # thumbnail = every Nth pixel each way
+PIXEL_DELTA = int(os.getenv("DECIMATE_PIXEL_DELTA", 20))                 # per-channel change that counts
+CHANGED_FRACTION = float(os.getenv("DECIMATE_CHANGED_FRACTION", 0.002))  # of thumbnail pixels
+# Upper bounds on frames between MediaPipe calls. With SEQ_LENGTH 30 they
+# leave at least 10 (under load) and 5 (still scene) real frames per window.
+MAX_STRIDE = int(os.getenv("DECIMATE_MAX_STRIDE", 3))
+MAX_HOLD = int(os.getenv("DECIMATE_MAX_HOLD", 6))
+# keypoint-lane backlog (jobs waiting besides this one) that moves the stride
+QUEUE_HIGH = int(os.getenv("DECIMATE_QUEUE_HIGH", 2))
+QUEUE_LOW = int(os.getenv("DECIMATE_QUEUE_LOW", 0))
+FPS_SMOOTHING = 0.3
+
+
+class FrameDecimator:
+    """Per-session gate in front of MediaPipe.
+
+    `check` returns None when the frame must be processed, or the reason it
+    can be skipped: "load" (inside the requested stride) or "unchanged"
+    (fewer than `changed_fraction` of a strided thumbnail's pixels moved by
+    `pixel_delta` since the last processed frame). Changes are measured
+    against the last processed frame, so slow drift still accumulates, and
+    at least one frame in every `max_hold` is processed regardless.
+    """
+
+    def __init__(self, pixel_step=PIXEL_STEP, pixel_delta=PIXEL_DELTA, changed_fraction=CHANGED_FRACTION,
+                 max_hold=MAX_HOLD):
+        self.pixel_step = max(1, pixel_step)
+        self.pixel_delta = pixel_delta
+        self.changed_fraction = changed_fraction
+        self.max_hold = max(1, max_hold)
+        self.reset()
+
+    def reset(self):
+        self._thumbnail = None
+        self._since = 0   # frames since the last processed one
+        self.last = None  # keypoints a skipped frame repeats at the start of the next chunk
+
+    def check(self, frame, stride=1):
+        self._since += 1
+        first = self._thumbnail is None
+        if not first and self._since < stride:
+            return "load"
+        thumbnail = frame[::self.pixel_step, ::self.pixel_step].astype(np.int16)
+        if not first and self._since < self.max_hold and thumbnail.shape == self._thumbnail.shape:
+            changed = np.any(np.abs(thumbnail - self._thumbnail) > self.pixel_delta, axis=-1)
+            if changed.mean() < self.changed_fraction:
+                return "unchanged"
+        self._thumbnail = thumbnail
+        self._since = 0
+        return None
+
+
+class RateController:
+    """Per-session processing stride driven by keypoint-lane backlog.
+
+    Steps the stride up by one while the backlog is at or above `high` and
+    back down while it is at or below `low`, between 1 and `max_stride`.
+    Also tracks the session's effective MediaPipe frame rate.
+    """
+
+    def __init__(self, max_stride=MAX_STRIDE, high=QUEUE_HIGH, low=QUEUE_LOW):
+        self.max_stride = max(1, max_stride)
+        self.high = high
+        self.low = low
+        self.stride = 1
+        self.fps = 0.0
+        self._last = None
+
+    def update(self, backlog):
+        """Stride for the next chunk, given the jobs already queued on the session's lane"""
+        if backlog >= self.high:
+            self.stride = min(self.stride + 1, self.max_stride)
+        elif backlog <= self.low:
+            self.stride = max(self.stride - 1, 1)
+        return self.stride
+
+    def record(self, processed, now):
+        """Fold one chunk's processed-frame count into the smoothed frames per second"""
+        if self._last is not None and now > self._last:
+            rate = processed / (now - self._last)
+            self.fps = rate if self.fps == 0.0 else self.fps + FPS_SMOOTHING * (rate - self.fps)
+        self._last = now
+        return self.fps
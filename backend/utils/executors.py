@@ -0,0 +1,199 @@
+# utils/executors.py
+# Staged execution for the server. Video decode + MediaPipe run in worker
+# processes and blocking LLM / TTS calls run in a thread pool, so the event
+# loop itself only moves bytes and JSON around.
+import asyncio
+import itertools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.metrics import STAGE_REJECTED, STAGE_SECONDS
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+IO_WORKERS = int(os.getenv("IO_WORKERS", 8))
+CPU_QUEUE_LIMIT = int(os.getenv("CPU_QUEUE_LIMIT", CPU_WORKERS * 4))
+IO_QUEUE_LIMIT = int(os.getenv("IO_QUEUE_LIMIT", IO_WORKERS * 8))
+# MediaPipe graphs each keypoint worker holds (utils/keypoint_utils.py). A
+# streaming session keeps one for its lifetime, two with MEDIAPIPE_ROI=1 (a
+# second graph tracks the signer crop); a one-off job borrows one while it runs.
+POOL_SIZE = int(os.getenv("MEDIAPIPE_POOL_SIZE", 4))
+ROI_TRACKING = os.getenv("MEDIAPIPE_ROI", "0") == "1"
+GRAPHS_PER_SESSION = 2 if ROI_TRACKING else 1
+# seconds a worker job waits for a graph before giving up with StageBusy
+GRAPH_TIMEOUT = float(os.getenv("MEDIAPIPE_ACQUIRE_TIMEOUT", 10))
+
+
+def _keypoint_job(name, *args):
+    """Runs in a keypoint worker: calls utils.keypoint_utils.<name>(*args).
+
+    Jobs name the function instead of pickling it, so the server process
+    itself never imports MediaPipe.
+    """
+    from utils import keypoint_utils
+    return getattr(keypoint_utils, name)(*args)
+
+
+class StageBusy(Exception):
+    """Raised when a stage already holds its limit of queued + running jobs"""
+
+
+class Stage:
+    """Bounded asyncio front for an executor.
+
+    `pending` is only touched from the event loop thread, so a plain counter
+    is enough to enforce the queue limit.
+    """
+
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.pending = 0
+
+    async def _submit(self, executor, fn, *args):
+        if self.pending >= self.limit:
+            STAGE_REJECTED.labels(self.name).inc()
+            raise StageBusy(f"{self.name} stage is busy ({self.limit} jobs queued)")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+
+class IOStage(Stage):
+    """Thread pool for blocking network calls (Gemini, gTTS)"""
+
+    def __init__(self, workers=IO_WORKERS, limit=IO_QUEUE_LIMIT):
+        super().__init__("io", limit)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="io-stage")
+
+    async def run(self, fn, *args):
+        return await self._submit(self.executor, fn, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class KeypointStage(Stage):
+    """Worker processes for decode + MediaPipe keypoint extraction.
+
+    Each worker is its own single-process lane. A streaming session is pinned
+    to one lane for its lifetime so the MediaPipe graph it holds there keeps
+    tracking state between chunks; one-off uploads go to the least busy lane
+    that still has a graph free. Graphs are counted here, as claimed, so a job
+    is never queued behind sessions that hold every graph of its lane (the
+    worker would block on the pool while the jobs that free graphs wait
+    behind it).
+    """
+
+    def __init__(self, workers=CPU_WORKERS, limit=CPU_QUEUE_LIMIT):
+        super().__init__("keypoints", limit)
+        self.workers = max(1, workers)
+        self.lanes = []
+        self._lane_load = [0] * self.workers
+        self._lane_sessions = [0] * self.workers
+        self._lane_graphs = [0] * self.workers  # claimed by open sessions and running one-off jobs
+        self._session_ids = itertools.count(1)
+
+    def start(self):
+        """Create the worker pools. Deferred to server startup so a preloading
+        parent (gunicorn.conf.py) never hands the same pipes to several workers."""
+        if not self.lanes:
+            # spawn, not fork: the parent has the model loaded and workers don't need it
+            context = multiprocessing.get_context("spawn")
+            self.lanes = [ProcessPoolExecutor(max_workers=1, mp_context=context) for _ in range(self.workers)]
+
+    def _least_busy_lane(self):
+        return min(range(self.workers), key=self._lane_load.__getitem__)
+
+    def _busy(self, reason):
+        STAGE_REJECTED.labels(self.name).inc()
+        return StageBusy(f"{self.name} stage is busy ({reason})")
+
+    async def _with_graph(self, *job):
+        """Run a one-off job that borrows a graph on the least busy lane with one free"""
+        lanes = [i for i in range(self.workers) if self._lane_graphs[i] < POOL_SIZE]
+        if not lanes:
+            raise self._busy("every MediaPipe graph is in use")
+        lane = min(lanes, key=self._lane_load.__getitem__)
+        self._lane_graphs[lane] += 1
+        try:
+            return await self._on_lane(lane, _keypoint_job, *job)
+        finally:
+            self._lane_graphs[lane] -= 1
+
+    async def _on_lane(self, lane, fn, *args):
+        self.start()
+        self._lane_load[lane] += 1
+        try:
+            return await self._submit(self.lanes[lane], fn, *args)
+        finally:
+            self._lane_load[lane] -= 1
+
+    @staticmethod
+    def _record(result):
+        seq, timings = result
+        STAGE_SECONDS.labels("decode").observe(timings["decode"])
+        STAGE_SECONDS.labels("mediapipe").observe(timings["mediapipe"])
+        return seq
+
+    async def extract(self, data, suffix=".mp4"):
+        """Keypoint sequence for one self-contained video"""
+        return self._record(await self._with_graph("extract_timed", data, suffix))
+
+    async def probe(self, data):
+        """(start, duration, fps) of a video; see video_utils.probe_video"""
+        return await self._on_lane(self._least_busy_lane(), _keypoint_job, "probe_video", data)
+
+    async def extract_range(self, data, suffix=".mp4", start=0.0, end=None):
+        """(keypoint sequence, frame times in seconds) for the frames of a video in [start, end)"""
+        result = await self._with_graph("extract_time_range", data, suffix, start, end)
+        return self._record(result), result[1]["times"]
+
+    def open_session(self):
+        """Pin a new streaming session to a lane; returns an opaque session handle.
+
+        Raises StageBusy when no lane has GRAPHS_PER_SESSION graphs left.
+        """
+        lanes = [i for i in range(self.workers) if self._lane_graphs[i] + GRAPHS_PER_SESSION <= POOL_SIZE]
+        if not lanes:
+            raise self._busy("no MediaPipe graph free for another session")
+        lane = min(lanes, key=lambda i: (self._lane_sessions[i], self._lane_load[i]))
+        self._lane_sessions[lane] += 1
+        self._lane_graphs[lane] += GRAPHS_PER_SESSION
+        return next(self._session_ids), lane
+
+    def backlog(self, session):
+        """Jobs queued or running on the session's lane"""
+        return self._lane_load[session[1]]
+
+    async def extract_for_session(self, session, data, suffix=".mp4", stride=1):
+        """(keypoint sequence, {reason: skipped frames}) for the session's next chunk.
+
+        `stride` is the decimation stride (see utils/decimation.py).
+        """
+        session_id, lane = session
+        result = await self._on_lane(lane, _keypoint_job, "extract_for_session", session_id, data, suffix, stride)
+        return self._record(result), result[1]["skipped"]
+
+    async def close_session(self, session):
+        session_id, lane = session
+        self._lane_sessions[lane] -= 1
+        try:
+            # not counted against the queue limit: closing must always get through
+            await asyncio.get_running_loop().run_in_executor(self.lanes[lane], _keypoint_job, "end_session",
+                                                             session_id)
+        finally:
+            # only now are the session's graphs back in the worker's pool
+            self._lane_graphs[lane] -= GRAPHS_PER_SESSION
+
+    async def warm(self):
+        """Start every worker and build its MediaPipe graph before the first request"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(lane, _keypoint_job, "warm_worker") for lane in self.lanes))
+
+    def shutdown(self):
+        for lane in self.lanes:
+            lane.shutdown(wait=False, cancel_futures=True)
@@ -1,17 +1,212 @@
-import google.generativeai as genai
 from dotenv import load_dotenv
 load_dotenv()
 import os
+import json
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+
+from utils.metrics import STAGE_SECONDS
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-pro")
+INTERPRET_CACHE_SIZE = int(os.getenv("INTERPRET_CACHE_SIZE", 5000))
+INTERPRET_CACHE_TTL = float(os.getenv("INTERPRET_CACHE_TTL_HOURS", 24 * 7)) * 3600
+INTERPRET_CACHE_FILE = os.getenv("INTERPRET_CACHE_FILE", "")  # empty: don't persist
+
+# Known sign sequences answered without the LLM
+LOCAL_PHRASES = {
+    "hello": "Hello.",
+    "hello friend": "Hello, friend.",
+    "hello family": "Hello, family.",
+    "goodbye": "Goodbye.",
+    "goodbye friend": "Goodbye, friend.",
+    "thanks": "Thanks.",
+    "thankyou": "Thank you.",
+    "thankyou friend": "Thank you, friend.",
+    "welcome": "You're welcome.",
+    "sorry": "I'm sorry.",
+    "please": "Please.",
+    "please help": "Please help.",
+    "help": "Help!",
+    "iloveyou": "I love you.",
+    "congratulations": "Congratulations!",
+    "good morning": "Good morning.",
+    "morning": "Good morning.",
+    "good night": "Good night.",
+    "night": "Good night.",
+    "yes": "Yes.",
+    "no": "No.",
+    "maybe": "Maybe.",
+    "stop": "Stop.",
+    "wait": "Wait.",
+    "come": "Come here.",
+    "sit": "Please sit.",
+    "later": "See you later.",
+    "tomorrow": "See you tomorrow.",
+    "happy": "I'm happy.",
+    "sad": "I'm sad.",
+    "angry": "I'm angry.",
+    "tired": "I'm tired.",
+    "excited": "I'm excited.",
+    "surprised": "I'm surprised.",
+    "eat": "I want to eat.",
+    "drink": "I want a drink.",
+    "sleep": "I want to sleep.",
+}
+
+
+def normalize_signs(text: str) -> str:
+    """Lowercase, collapse whitespace and repeated consecutive signs"""
+    tokens = []
+    for token in text.strip().lower().split():
+        if not tokens or tokens[-1] != token:
+            tokens.append(token)
+    return " ".join(tokens)
+
+
+def local_interpretation(key: str):
+    """Answer from the phrase table, or None if the sequence isn't known"""
+    return LOCAL_PHRASES.get(key)
+
+
+class InterpretCache:
+    """LRU + TTL memo of sign sequence -> sentence, optionally persisted as JSON"""
+
+    def __init__(self, max_size=INTERPRET_CACHE_SIZE, ttl=INTERPRET_CACHE_TTL, path=INTERPRET_CACHE_FILE):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()  # key -> [sentence, created]
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries.update(json.load(f))
+            except (FileNotFoundError, ValueError):
+                pass
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[1] > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, sentence):
+        with self._lock:
+            self.entries[key] = [sentence, time.time()]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            if self.path:
+                self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+interpret_cache = InterpretCache()
+rephrase_cache = InterpretCache(path="")  # text-to-sign gap -> sign words, in memory only
+interpret_counters = {"local": 0, "cache_hits": 0, "cache_misses": 0, "remote_errors": 0, "rephrased_gaps": 0}
+_counter_lock = threading.Lock()
+_model = None
+_model_lock = threading.Lock()
+
+
+def _count(name):
+    with _counter_lock:
+        interpret_counters[name] += 1
+
+
+def get_model():
+    """Shared GenerativeModel client, built on first use"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            # imported here: google.generativeai alone takes ~1 s to import
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            _model = genai.GenerativeModel(GEMINI_MODEL)
+        return _model
+
+
+def interpret_stats():
+    with _counter_lock:
+        stats = dict(interpret_counters)
+    stats["cache_entries"] = len(interpret_cache.entries)
+    return stats
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY") )
 
 def interpret_text(text: str) -> str:
-    """Use Gemini to clean and interpret detected sign phrases"""
-    model = genai.GenerativeModel("gemini-pro")
-    prompt = f"Convert this raw sign sequence into a natural English sentence: '{text}'. Keep it short and meaningful."
+    """Use Gemini to clean and interpret detected sign phrases.
+
+    Known short sequences are answered locally and previous answers are
+    memoized, so only novel sequences reach the model.
+    """
+    key = normalize_signs(text)
+    local = local_interpretation(key)
+    if local is not None:
+        _count("local")
+        return local
+
+    cached = interpret_cache.get(key)
+    if cached is not None:
+        _count("cache_hits")
+        return cached
+    _count("cache_misses")
+
+    prompt = f"Convert this raw sign sequence into a natural English sentence: '{key}'. Keep it short and meaningful."
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        with STAGE_SECONDS.labels("llm").time():
+            response = get_model().generate_content(prompt)
+        sentence = response.text.strip()
     except Exception as e:
         print("Gemini error:", e)
+        _count("remote_errors")
         return text
+    interpret_cache.put(key, sentence)
+    return sentence
+
+
+def rephrase_for_signs(gaps, vocabulary):
+    """Rewrite each phrase no sign covers using only words from `vocabulary`.
+
+    One model call for all uncached gaps; returns a list aligned with
+    `gaps` ("" where the model found nothing, or the original phrase if
+    the call failed).
+    """
+    results = {gap: rephrase_cache.get(gap) for gap in gaps}
+    missing = [gap for gap, words in results.items() if words is None]
+    if missing:
+        prompt = (
+            "Rewrite each of these English phrases using only words from this sign vocabulary: "
+            f"{', '.join(sorted(vocabulary))}. Drop words that have no equivalent. "
+            "Reply with only a JSON list of strings, one per phrase, in order: "
+            f"{json.dumps(missing)}"
+        )
+        try:
+            with STAGE_SECONDS.labels("llm").time():
+                response = get_model().generate_content(prompt)
+            text = response.text.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+            answers = json.loads(text)
+            if not isinstance(answers, list) or len(answers) != len(missing):
+                raise ValueError(f"expected {len(missing)} answers, got {answers!r}")
+        except Exception as e:
+            print("Gemini error:", e)
+            _count("remote_errors")
+            return [results[gap] if results[gap] is not None else gap for gap in gaps]
+        for gap, words in zip(missing, answers):
+            words = str(words).strip().lower()
+            rephrase_cache.put(gap, words)
+            results[gap] = words
+            _count("rephrased_gaps")
+    return [results[gap] for gap in gaps]
@@ -0,0 +1,370 @@
+# utils/inference_backends.py
+# Interchangeable runtimes for the sign LSTM. All of them take a float32
+# (batch, SEQ_LENGTH, features) array and return (batch, classes) softmax
+# probabilities from the same trained weights:
+#   keras  - full TensorFlow, loads model_best.keras
+#   tflite - TFLite interpreter (ai_edge_litert / tflite_runtime if installed), loads an exported .tflite
+#   numpy  - pure NumPy forward pass over weights exported to .npz; no TensorFlow at all
+# Export the .tflite / .npz files with `python export_model.py`.
+# Input normalization (if the model was trained with it) is applied by
+# `apply_normalization`.
+import json
+import os
+
+import numpy as np
+
+# Precision of the exported artefact to load (see export_model.py):
+#   float32 -> model_best.tflite / .npz, float16 -> .fp16.*, int8 -> .int8.tflite
+MODEL_VARIANTS = {"float32": "", "float16": ".fp16", "int8": ".int8"}
+MODEL_VARIANT = os.getenv("SIGN_MODEL_VARIANT", "float32")
+# export_model.py writes .npz weights only for these; NumpyBackend computes in float32
+NUMPY_VARIANTS = ("float32", "float16")
+
+
+def variant_path(path, variant=MODEL_VARIANT):
+    """model_best.tflite -> model_best.fp16.tflite etc."""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown SIGN_MODEL_VARIANT {variant!r}; expected one of {', '.join(MODEL_VARIANTS)}")
+    stem, ext = os.path.splitext(path)
+    return stem + MODEL_VARIANTS[variant] + ext
+
+
+SIGN_BACKEND = os.getenv("SIGN_BACKEND", "keras")
+MODEL_PATH = os.getenv("SIGN_MODEL_PATH", "model_best.keras")
+TFLITE_MODEL_PATH = os.getenv("SIGN_TFLITE_PATH", variant_path("model_best.tflite"))
+NUMPY_WEIGHTS_PATH = os.getenv("SIGN_NUMPY_WEIGHTS_PATH", variant_path("model_best.npz"))
+# Step LSTM state per frame instead of re-running windows where a prediction
+# is shown on every frame (test_camera.py); needs the numpy weights
+STREAMING_INFERENCE = os.getenv("STREAMING_INFERENCE", "1") == "1"
+# Per-feature input mean/std saved by training (utils/train_utils.py) next to the model
+NORM_STATS_PATH = os.getenv("SIGN_NORM_STATS_PATH", os.path.splitext(MODEL_PATH)[0] + ".norm.npz")
+
+
+class KerasBackend:
+    name = "keras"
+
+    def __init__(self, path=MODEL_PATH):
+        import tensorflow as tf
+        self.model = tf.keras.models.load_model(path)
+        self.input_shape = tuple(self.model.input_shape[1:])
+
+    def predict(self, X):
+        return np.asarray(self.model.predict_on_batch(X))
+
+
+class TFLiteBackend:
+    name = "tflite"
+
+    def __init__(self, path=TFLITE_MODEL_PATH):
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+        self.interpreter = Interpreter(model_path=path)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(int(d) for d in self._input["shape"][1:])
+
+    def _quantize(self, X):
+        """Map float inputs onto an int8/uint8 input tensor if the model was fully quantized"""
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return X
+        scale, zero_point = self._input["quantization"]
+        return np.clip(np.round(X / scale + zero_point), np.iinfo(dtype).min, np.iinfo(dtype).max).astype(dtype)
+
+    def predict(self, X):
+        """Invoke once per window: the exported graph has a fixed batch of 1"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = []
+        for window in X:
+            self.interpreter.set_tensor(self._input["index"], self._quantize(window[None]))
+            self.interpreter.invoke()
+            out.append(self.interpreter.get_tensor(self._output["index"])[0])
+        out = np.stack(out)
+        if out.dtype != np.float32:
+            scale, zero_point = self._output["quantization"]
+            out = (out.astype(np.float32) - zero_point) * scale
+        return out
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # overflow-free logistic
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "softmax": _softmax,
+}
+
+
+class NumpyBackend:
+    """Inference-only forward pass of the Sequential LSTM / BatchNorm / Dense stack.
+
+    Dropout is an identity at inference, and BatchNormalization folds into a
+    per-feature scale and shift at load time.
+    """
+    name = "numpy"
+
+    def __init__(self, path=NUMPY_WEIGHTS_PATH):
+        data = np.load(path)
+        spec = json.loads(str(data["__spec__"]))
+        self.input_shape = tuple(spec["input_shape"])
+        self.layers = []
+        for i, layer in enumerate(spec["layers"]):
+            w = [data[f"{i}_{k}"].astype(np.float32) for k in range(layer["weights"])]
+            kind = layer["type"]
+            if kind == "LSTM":
+                kernel, recurrent, bias = w
+                self.layers.append(("lstm", kernel, recurrent, bias, layer["return_sequences"],
+                                    _ACTIVATIONS[layer["activation"]], _ACTIVATIONS[layer["recurrent_activation"]]))
+            elif kind == "BatchNormalization":
+                gamma, beta, mean, var = w
+                scale = gamma / np.sqrt(var + layer["epsilon"])
+                self.layers.append(("affine", scale, beta - mean * scale))
+            elif kind == "Dense":
+                kernel, bias = w
+                self.layers.append(("dense", kernel, bias, _ACTIVATIONS[layer["activation"]]))
+            elif kind in ("Dropout", "InputLayer"):
+                continue
+            else:
+                raise ValueError(f"NumpyBackend can't run layer type {kind}")
+
+    @staticmethod
+    def lstm_step(x_proj, h, c, recurrent, activation, recurrent_activation):
+        """One LSTM timestep; x_proj is the input already multiplied by the kernel plus bias"""
+        units = h.shape[-1]
+        z = x_proj + h @ recurrent
+        i = recurrent_activation(z[:, :units])
+        f = recurrent_activation(z[:, units:2 * units])
+        g = activation(z[:, 2 * units:3 * units])
+        o = recurrent_activation(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * activation(c)
+        return h, c
+
+    def _lstm(self, X, kernel, recurrent, bias, return_sequences, activation, recurrent_activation):
+        batch, steps, _ = X.shape
+        units = recurrent.shape[0]
+        # input projection for every timestep in one matmul
+        x_proj = X @ kernel + bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        outputs = np.empty((batch, steps, units), dtype=np.float32) if return_sequences else None
+        for t in range(steps):
+            h, c = self.lstm_step(x_proj[:, t], h, c, recurrent, activation, recurrent_activation)
+            if return_sequences:
+                outputs[:, t] = h
+        return outputs if return_sequences else h
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        for layer in self.layers:
+            kind = layer[0]
+            if kind == "lstm":
+                X = self._lstm(X, *layer[1:])
+            elif kind == "affine":
+                X = X * layer[1] + layer[2]
+            else:
+                X = layer[3](X @ layer[1] + layer[2])
+        return X
+
+
+class StreamingClassifier:
+    """Per-session incremental inference on a NumpyBackend.
+
+    Keeps LSTM hidden/cell state and advances one timestep per incoming
+    frame, so each frame costs O(1) instead of re-running a whole window.
+    The model was trained on `horizon`-frame windows starting from a zero
+    state, so `lanes` copies of the state run staggered by horizon/lanes
+    frames; each restarts from zero after `horizon` steps, and predictions
+    come from the lane with the longest history. A lane's output after k
+    steps equals the windowed prediction over those k frames, so the output
+    matches a prediction over the last `horizon` frames only for the first
+    `horizon` frames after a reset; later it covers between horizon/lanes
+    and `horizon` of the latest frames (`age.max()` of them).
+    """
+
+    def __init__(self, backend, horizon=None, lanes=2):
+        if not supports_streaming(backend):
+            raise TypeError("streaming inference needs the numpy backend with an LSTM first layer")
+        self._norm = None
+        if isinstance(backend, NormalizedBackend):
+            self._norm = (backend.mean, backend.inv_std)
+            backend = backend.backend
+        self.backend = backend
+        self.horizon = horizon or backend.input_shape[0]
+        self.lanes = max(1, min(lanes, self.horizon))
+        self._state = [
+            (np.zeros((self.lanes, layer[2].shape[0]), dtype=np.float32),
+             np.zeros((self.lanes, layer[2].shape[0]), dtype=np.float32))
+            for layer in backend.layers if layer[0] == "lstm"
+        ]
+        self.reset()
+
+    def reset(self):
+        """Segment boundary: drop all recurrent state"""
+        for h, c in self._state:
+            h[:] = 0
+            c[:] = 0
+        # negative age: lane starts that many frames later
+        self.age = -(np.arange(self.lanes) * self.horizon // self.lanes)
+        self.frames = 0
+
+    @property
+    def ready(self):
+        """True once some lane has seen at least horizon/lanes frames"""
+        return self.age.max() >= self.horizon // self.lanes
+
+    def step(self, frame):
+        """Advance by one frame; returns the class probabilities after it"""
+        return self.step_many(np.asarray(frame)[None])[-1]
+
+    def step_many(self, frames):
+        """Advance frame by frame through (n, features); returns (n, classes) probabilities"""
+        frames = np.asarray(frames, dtype=np.float32)
+        if self._norm is not None:
+            frames = (frames - self._norm[0]) * self._norm[1]
+        # every lane sees the same frames: the first layer's input projection
+        # is shared, and done for the whole batch of frames in one matmul
+        first = self.backend.layers[0]
+        first_proj = frames @ first[1] + first[3]
+        out = None
+        for t in range(len(frames)):
+            # lanes that finished a full window start over from zero
+            for lane in np.flatnonzero(self.age >= self.horizon):
+                for h, c in self._state:
+                    h[lane] = 0
+                    c[lane] = 0
+                self.age[lane] = 0
+            waiting = self.age < 0
+            X = None
+            lstm_index = 0
+            for layer in self.backend.layers:
+                kind = layer[0]
+                if kind == "lstm":
+                    _, kernel, recurrent, bias, _, activation, recurrent_activation = layer
+                    x_proj = first_proj[t:t + 1] if X is None else X @ kernel + bias
+                    h, c = self._state[lstm_index]
+                    h[:], c[:] = NumpyBackend.lstm_step(x_proj, h, c, recurrent,
+                                                        activation, recurrent_activation)
+                    if waiting.any():
+                        h[waiting] = 0
+                        c[waiting] = 0
+                    X = h.copy()
+                    lstm_index += 1
+                elif kind == "affine":
+                    X = X * layer[1] + layer[2]
+                else:
+                    X = layer[3](X @ layer[1] + layer[2])
+            self.age += 1
+            self.frames += 1
+            if out is None:
+                out = np.empty((len(frames), X.shape[-1]), dtype=np.float32)
+            out[t] = X[int(np.argmax(self.age))]
+        return out
+
+
+class NormalizedBackend:
+    """Standardizes inputs with the training stats before the wrapped backend runs"""
+
+    def __init__(self, backend, mean, std):
+        self.backend = backend
+        self.name = backend.name
+        self.input_shape = backend.input_shape
+        self.mean = mean
+        self.inv_std = 1.0 / std
+
+    def predict(self, X):
+        return self.backend.predict((np.asarray(X, dtype=np.float32) - self.mean) * self.inv_std)
+
+
+def save_normalization(path, mean, std):
+    np.savez(path, mean=np.asarray(mean, dtype=np.float32), std=np.asarray(std, dtype=np.float32))
+    return path
+
+
+def load_normalization(path=NORM_STATS_PATH):
+    """(mean, std) per input feature, or None if the model has no stats file"""
+    if not os.path.exists(path):
+        return None
+    data = np.load(path)
+    return data["mean"].astype(np.float32), data["std"].astype(np.float32)
+
+
+def apply_normalization(backend, stats):
+    """Make `backend` standardize its inputs with (mean, std), if there are stats.
+
+    Kept as an explicit step rather than folded into the first layer: some
+    features have tiny variance around a large offset, and folding them into
+    the kernel loses float32 precision.
+    """
+    if stats is None:
+        return backend
+    return NormalizedBackend(backend, *stats)
+
+
+def supports_streaming(backend):
+    """True if StreamingClassifier can run on `backend`"""
+    if isinstance(backend, NormalizedBackend):
+        backend = backend.backend
+    return isinstance(backend, NumpyBackend) and backend.layers[0][0] == "lstm"
+
+
+def export_numpy_weights(model, path=NUMPY_WEIGHTS_PATH, dtype=None):
+    """Save a Keras Sequential model's weights and layer spec for NumpyBackend.
+
+    With `dtype` (e.g. np.float16) the kernels are stored at that precision;
+    biases and BatchNorm statistics stay float32. They are upcast at load.
+    """
+    arrays = {}
+    layers = []
+    for i, layer in enumerate(model.layers):
+        config = layer.get_config()
+        weights = layer.get_weights()
+        entry = {"type": type(layer).__name__, "weights": len(weights)}
+        if entry["type"] == "LSTM":
+            entry.update(return_sequences=config["return_sequences"],
+                         activation=config["activation"],
+                         recurrent_activation=config["recurrent_activation"])
+        elif entry["type"] == "Dense":
+            entry["activation"] = config["activation"]
+        elif entry["type"] == "BatchNormalization":
+            entry["epsilon"] = config["epsilon"]
+        layers.append(entry)
+        for k, w in enumerate(weights):
+            arrays[f"{i}_{k}"] = w.astype(dtype) if dtype is not None and w.ndim > 1 else w
+    spec = {"input_shape": [int(d) for d in model.input_shape[1:]], "layers": layers}
+    np.savez(path, __spec__=json.dumps(spec), **arrays)
+    return path
+
+
+INFERENCE_BACKENDS = {
+    "keras": KerasBackend,
+    "tflite": TFLiteBackend,
+    "numpy": NumpyBackend,
+}
+
+
+def load_backend(name=SIGN_BACKEND, path=None, variant=MODEL_VARIANT):
+    """Instantiate the configured backend (SIGN_BACKEND) from its default or given path"""
+    if name not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown SIGN_BACKEND {name!r}; expected one of {', '.join(INFERENCE_BACKENDS)}")
+    if name == "numpy" and variant not in NUMPY_VARIANTS and not path and "SIGN_NUMPY_WEIGHTS_PATH" not in os.environ:
+        raise ValueError(f"SIGN_MODEL_VARIANT={variant} has no NumPy weights (export_model.py only writes "
+                         f"{', '.join(NUMPY_VARIANTS)} .npz files); use SIGN_BACKEND=tflite for {variant}")
+    backend_cls = INFERENCE_BACKENDS[name]
+    return backend_cls(path) if path else backend_cls()
@@ -0,0 +1,265 @@
+# utils/keypoint_utils.py
+# MediaPipe side of the sign pipeline: pools of warm solution graphs and
+# keypoint extraction from video. Kept free of TensorFlow so it can be
+# imported on its own.
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import mediapipe as mp
+import numpy as np
+
+from mediapipe_utils import NUM_FEATURES, extract_keypoints, mediapipe_process_frame
+from utils.decimation import FrameDecimator
+from utils.executors import GRAPH_TIMEOUT, POOL_SIZE, ROI_TRACKING, StageBusy
+from utils.roi_tracker import ROITracker
+from utils.video_utils import iter_frames, iter_frames_from_file, iter_timed_frames, probe_video
+
+mp_hands = mp.solutions.hands
+mp_holistic = mp.solutions.holistic
+INITIAL_FRAMES = 64  # rows preallocated per sequence, doubled as needed
+
+# POOL_SIZE graphs per process; with ROI_TRACKING (MEDIAPIPE_ROI=1) streaming
+# sessions track a signer crop (utils/roi_tracker.py) on a second graph
+
+
+class MediaPipePool:
+    """Bounded pool of warm MediaPipe solution graphs.
+
+    Building a graph loads its models, so graphs are created lazily up to
+    `size` and then recycled. A checked-out graph belongs to one caller (one
+    WebSocket session, or one upload) until it is released; release resets it
+    so tracking state never leaks between sessions.
+    """
+
+    def __init__(self, factory, size=POOL_SIZE):
+        self._factory = factory
+        self._size = size
+        self._idle = queue.LifoQueue()  # most recently used first, it is the warmest
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Check out a graph, building one if the pool has room; raises queue.Empty on timeout"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            build = self._created < self._size
+            if build:
+                self._created += 1
+        if build:
+            try:
+                return self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=timeout)
+
+    def release(self, graph):
+        """Return a graph to the pool, dropping its tracking state"""
+        try:
+            graph.reset()
+        except Exception:
+            # a graph that can't be reset is not safe to hand out again
+            graph.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(graph)
+
+    @contextmanager
+    def session(self, timeout=None):
+        graph = self.acquire(timeout)
+        try:
+            yield graph
+        finally:
+            self.release(graph)
+
+    def warm(self, count=None):
+        """Build graphs ahead of the first request"""
+        count = self._size if count is None else min(count, self._size)
+        graphs = [self.acquire() for _ in range(count)]
+        for graph in graphs:
+            self.release(graph)
+
+    def close(self):
+        while True:
+            try:
+                graph = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            graph.close()
+            with self._lock:
+                self._created -= 1
+
+
+hands_pool = MediaPipePool(lambda: mp_hands.Hands(static_image_mode=False, max_num_hands=1))
+holistic_pool = MediaPipePool(lambda: mp_holistic.Holistic(
+    static_image_mode=False,
+    model_complexity=1,
+    smooth_landmarks=True,
+    enable_segmentation=False,
+    refine_face_landmarks=False
+))
+
+
+def extract_keypoints_from_frames(frames, holistic=None, timings=None, decimator=None, stride=1, tracker=None):
+    """Extracts MediaPipe Holistic keypoints sequence from an iterable of BGR frames.
+
+    Returns a (frames, NUM_FEATURES) float32 array in the same layout the
+    recorder saves. Pass a graph checked out from `holistic_pool` to keep
+    tracking state across calls (e.g. consecutive chunks of one WebSocket
+    session); otherwise one is borrowed from the pool for this call.
+    With a `decimator` (utils/decimation.py), frames it lets through at
+    `stride` go to MediaPipe and the others repeat the previous row. With a
+    `tracker` (utils/roi_tracker.ROITracker), it runs MediaPipe instead.
+    If a `timings` dict is given, seconds spent in MediaPipe are added to
+    timings["mediapipe"] and skipped frames are counted per reason in
+    timings["skipped"].
+    """
+    if holistic is None:
+        with holistic_pool.session() as holistic:
+            return extract_keypoints_from_frames(frames, holistic, timings, decimator, stride, tracker)
+
+    sequence = np.zeros((INITIAL_FRAMES, NUM_FEATURES), dtype=np.float32)
+    n = 0
+    mediapipe_seconds = 0.0
+    skipped = {}
+    for frame in frames:
+        if n == len(sequence):
+            sequence = np.concatenate([sequence, np.zeros_like(sequence)])
+        reason = decimator.check(frame, stride) if decimator is not None else None
+        if reason is not None:
+            if n:
+                sequence[n] = sequence[n - 1]
+            elif decimator.last is not None:
+                sequence[n] = decimator.last
+            skipped[reason] = skipped.get(reason, 0) + 1
+            n += 1
+            continue
+        start = time.perf_counter()
+        if tracker is not None:
+            tracker.extract(frame, sequence[n])
+        else:
+            extract_keypoints(mediapipe_process_frame(frame, holistic), sequence[n])
+        mediapipe_seconds += time.perf_counter() - start
+        n += 1
+    if decimator is not None and n:
+        decimator.last = sequence[n - 1].copy()
+    if timings is not None:
+        timings["mediapipe"] = timings.get("mediapipe", 0.0) + mediapipe_seconds
+        totals = timings.setdefault("skipped", {})
+        for reason, count in skipped.items():
+            totals[reason] = totals.get(reason, 0) + count
+    return sequence[:n]
+
+
+def extract_keypoints_from_video(file_path, holistic=None):
+    """Extracts MediaPipe keypoints sequence from a video file"""
+    return extract_keypoints_from_frames(iter_frames_from_file(file_path), holistic)
+
+
+def extract_keypoints_from_bytes(data, suffix=".mp4", holistic=None):
+    """Extracts MediaPipe keypoints sequence from encoded video bytes, decoded in memory"""
+    return extract_keypoints_from_frames(iter_frames(data, suffix), holistic)
+
+
+# --- worker-process entry points (see utils/executors.KeypointStage) ---
+# These return (sequence, timings) so the server process can record decode
+# and MediaPipe time in its metrics.
+
+# session id -> MediaPipe graph / frame decimator / ROI tracker held by that streaming session in this process
+_session_graphs = {}
+_session_decimators = {}
+_session_trackers = {}
+
+
+def _timed_extract(data, suffix, holistic, decimator=None, stride=1, tracker=None):
+    timings = {"mediapipe": 0.0, "skipped": {}}
+    start = time.perf_counter()
+    seq = extract_keypoints_from_frames(iter_frames(data, suffix), holistic, timings, decimator, stride, tracker)
+    # frames are decoded lazily between MediaPipe calls; the rest is decode
+    timings["decode"] = time.perf_counter() - start - timings["mediapipe"]
+    return seq, timings
+
+
+def _acquire_graph():
+    """A graph from this worker's pool, or StageBusy after GRAPH_TIMEOUT seconds"""
+    try:
+        return holistic_pool.acquire(timeout=GRAPH_TIMEOUT)
+    except queue.Empty:
+        raise StageBusy(f"no MediaPipe graph free within {GRAPH_TIMEOUT:g} s")
+
+
+@contextmanager
+def _borrowed_graph():
+    holistic = _acquire_graph()
+    try:
+        yield holistic
+    finally:
+        holistic_pool.release(holistic)
+
+
+def extract_timed(data, suffix=".mp4"):
+    """Extract keypoints from one self-contained video with a pooled graph"""
+    with _borrowed_graph() as holistic:
+        return _timed_extract(data, suffix, holistic)
+
+
+def extract_for_session(session_id, data, suffix=".mp4", stride=1):
+    """Extract keypoints with the graph and decimator this process holds for `session_id`"""
+    holistic = _session_graphs.get(session_id)
+    if holistic is None:
+        holistic = _acquire_graph()
+        if ROI_TRACKING:
+            try:
+                _session_trackers[session_id] = ROITracker(holistic, _acquire_graph())
+            except StageBusy:
+                holistic_pool.release(holistic)
+                raise
+        _session_graphs[session_id] = holistic
+        _session_decimators[session_id] = FrameDecimator()
+    return _timed_extract(data, suffix, holistic, _session_decimators[session_id], stride,
+                          _session_trackers.get(session_id))
+
+
+def extract_time_range(data, suffix=".mp4", start=0.0, end=None):
+    """Extract keypoints for the frames in [start, end) seconds with a pooled graph.
+
+    One chunk of a long video; the frame times come back in timings["times"].
+    """
+    times = []
+
+    def frames():
+        for t, frame in iter_timed_frames(data, suffix, start, end):
+            times.append(t)
+            yield frame
+
+    with _borrowed_graph() as holistic:
+        timings = {"mediapipe": 0.0, "skipped": {}}
+        started = time.perf_counter()
+        seq = extract_keypoints_from_frames(frames(), holistic, timings)
+        timings["decode"] = time.perf_counter() - started - timings["mediapipe"]
+    timings["times"] = np.array(times, dtype=np.float64)
+    return seq, timings
+
+
+def end_session(session_id):
+    _session_decimators.pop(session_id, None)
+    tracker = _session_trackers.pop(session_id, None)
+    if tracker is not None:
+        holistic_pool.release(tracker.tracker)
+    holistic = _session_graphs.pop(session_id, None)
+    if holistic is not None:
+        holistic_pool.release(holistic)
+
+
+# probe_video (utils/video_utils.py) is also called as a worker job
+
+
+def warm_worker():
+    holistic_pool.warm(1)
@@ -0,0 +1,246 @@
+# utils/metrics.py
+# In-process counters, gauges and histograms rendered in the Prometheus text
+# exposition format (served on GET /metrics). Recording a value is one dict
+# lookup plus a short lock; everything else happens when /metrics is scraped.
+# The registry is per process: under gunicorn each worker counts only its own
+# requests and a scrape is answered by whichever worker accepts it. Every
+# sample therefore carries a worker="<pid>" label, so the series of different
+# workers never overwrite each other; aggregate across workers in the query,
+# e.g. sum without (worker) (rate(signbridge_predictions_total[5m])).
+import bisect
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# seconds; spans a single MediaPipe frame up to a slow Gemini / gTTS round trip
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"metric {metric.name} already registered")
+            self._metrics.append(metric)
+
+    def render(self):
+        """All metrics in Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        # read at scrape time: with preload_app the registry is built before the fork
+        worker = (("worker", str(os.getpid())),)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(worker))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    """A named metric family; `labels(...)` returns the child for one label set"""
+    kind = None
+
+    def __init__(self, name, description, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def remove(self, *values):
+        """Drop the child for one label set (e.g. a closed session)"""
+        with self._lock:
+            self._children.pop(values, None)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_text(self, values, extra=()):
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self, extra=()):
+        """HELP/TYPE header and one sample per child; `extra` (name, value) labels go on every sample"""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(self._render_child(values, child, extra))
+        return lines
+
+    def _render_child(self, values, child, extra=()):
+        return [f"{self.name}{self._label_text(values, extra)} {_format_value(child.get())}"]
+
+
+class _Value:
+    __slots__ = ("value", "fn", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.fn = None
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, fn):
+        """Read the value from `fn()` at scrape time instead of storing it"""
+        self.fn = fn
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+
+class Counter(_Metric):
+    """Monotonic total; by convention the name ends in _total"""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, or is computed when scraped"""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def set_function(self, fn):
+        self.labels().set_function(fn)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, description, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self, values, child, extra=()):
+        with child.lock:
+            counts = list(child.counts)
+            total = child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = list(extra) + [("le", _format_value(bound))]
+            lines.append(f"{self.name}_bucket{self._label_text(values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._label_text(values, extra)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{self._label_text(values, extra)} {cumulative}")
+        return lines
+
+
+# --------------- SERVER METRICS ---------------
+
+STAGE_SECONDS = Histogram(
+    "signbridge_stage_seconds",
+    "Time spent in each pipeline stage (decode, mediapipe, inference, llm, tts)",
+    ["stage"],
+)
+INFERENCE_WAIT_SECONDS = Histogram(
+    "signbridge_inference_wait_seconds",
+    "Time a window waited in the batching queue before its forward pass",
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "signbridge_inference_batch_size",
+    "Windows per batched forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+FRAMES_RECEIVED = Counter("signbridge_frames_received_total", "Frames received from clients", ["mode"])
+FRAMES_DROPPED = Counter("signbridge_frames_dropped_total", "Frames discarded before classification", ["mode", "reason"])
+FRAMES_SKIPPED = Counter(
+    "signbridge_frames_skipped_total",
+    "Frames that reused the previous keypoints instead of running MediaPipe (unchanged, load)",
+    ["mode", "reason"],
+)
+FRAMES_CLASSIFIED = Counter("signbridge_frames_classified_total", "Frames that reached the sign classifier", ["mode"])
+PREDICTIONS = Counter("signbridge_predictions_total", "Sign predictions sent to clients", ["mode"])
+STAGE_REJECTED = Counter("signbridge_stage_rejected_total", "Jobs refused because a stage queue was full", ["stage"])
+ACTIVE_SESSIONS = Gauge("signbridge_active_sessions", "Open WebSocket sessions", ["mode"])
+SESSION_FPS = Gauge("signbridge_session_effective_fps", "Frames per second MediaPipe processes for a video session",
+                    ["session"])
+QUEUE_DEPTH = Gauge("signbridge_queue_depth", "Jobs queued or running per stage", ["stage"])
@@ -1,18 +1,33 @@
 # utils/ml_utils.py
-import mediapipe as mp
-import cv2
 import numpy as np
-import tensorflow as tf
-import tempfile
+import asyncio
 import json
 import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.inference_backends import apply_normalization, load_backend, load_normalization
+from utils.metrics import INFERENCE_BATCH_SIZE, INFERENCE_WAIT_SECONDS, STAGE_SECONDS
 
 SEQ_LENGTH = 30
-MODEL_PATH = "model_best.keras"
 MAPPING_PATH = "server/mapping.json"
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH", 32))
+MAX_QUEUE_DELAY = float(os.getenv("INFERENCE_MAX_DELAY_MS", 5)) / 1000
 
-# Load trained LSTM model
-model = tf.keras.models.load_model(MODEL_PATH)
+# Load trained LSTM model on the configured runtime (SIGN_BACKEND: keras / tflite / numpy)
+backend = load_backend()
+# Same input standardization as training, when the model came with its stats
+norm_stats = load_normalization()
+backend = apply_normalization(backend, norm_stats)
+print("Input normalization:", "on" if norm_stats is not None else "off (no stats file)")
+# Width of one keypoint frame as the trained model expects it
+INPUT_FEATURES = int(backend.input_shape[-1])
+# Trailing left+right hand block of a keypoint frame; all zeros means no hands in view
+HAND_FEATURES = min(21 * 3 * 2, INPUT_FEATURES)
 
 # Load label mapping (index → sign label)
 with open(MAPPING_PATH, "r") as f:
@@ -33,70 +48,250 @@ elif os.path.exists(MAPPING_PATH):
 else:
     raise FileNotFoundError("Neither models/label_encoder.pkl nor mapping.json found. Run prepare_dataset.py")
 
-mp_hands = mp.solutions.hands
-NUM_FEATURES = 21 * 3  # x, y, z for each of 21 hand landmarks
+class KeypointRingBuffer:
+    """Preallocated (seq_length, num_features) ring of the latest keypoint frames of one session.
 
-def extract_keypoints_from_video(file_path):
-    """Extracts MediaPipe keypoints sequence from uploaded video"""
-    cap = cv2.VideoCapture(file_path)
-    sequence = []
-    with mp_hands.Hands(static_image_mode=False, max_num_hands=1) as hands:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
+    Frames are written in place; until the ring wraps, rows [0, count) hold
+    them in order.
+    """
+
+    def __init__(self, seq_length=SEQ_LENGTH, num_features=None):
+        num_features = num_features or INPUT_FEATURES
+        self.buffer = np.zeros((seq_length, num_features), dtype=np.float32)
+        self._window = np.zeros_like(self.buffer)
+        self.seq_length = seq_length
+        self.num_features = num_features
+        self.head = 0   # next row to overwrite
+        self.count = 0  # frames pushed since last reset
+
+    def push(self, frame):
+        """Write one frame into the ring"""
+        self.buffer[self.head] = frame
+        self.head = (self.head + 1) % self.seq_length
+        self.count += 1
+
+    def push_many(self, frames):
+        """Write a (n, num_features) block of frames"""
+        for frame in frames:
+            self.push(frame)
+
+    def window(self):
+        """Return the buffered frames in chronological order (reuses an internal array)"""
+        tail = self.seq_length - self.head
+        self._window[:tail] = self.buffer[self.head:]
+        self._window[tail:] = self.buffer[:self.head]
+        return self._window
+
+    def reset(self):
+        self.head = 0
+        self.count = 0
+
+
+def decode_label(idx):
+    """Map a class index back to its sign label"""
+    if label_encoder is not None:
+        return label_encoder.inverse_transform([idx])[0]
+    # mapping.json maps index->label (ensure keys are strings in file)
+    return mapping.get(str(idx), "unknown_sign")
+
+class InferenceScheduler:
+    """Micro-batches keypoint windows from every session into one forward pass.
+
+    Callers `submit` a single window and get a Future for its class
+    probabilities. A worker thread takes the first pending window, waits at
+    most `max_delay` seconds for up to `max_batch_size - 1` more, and runs
+    them through the inference backend together.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=MAX_BATCH_SIZE, max_delay=MAX_QUEUE_DELAY):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_delay = max(0.0, float(max_delay))
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._windows = 0
+        self._max_batch_seen = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._batch_sizes = {}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def submit(self, window):
+        """Queue one (SEQ_LENGTH, features) window; the Future resolves to its probability vector"""
+        if self._thread is None:
+            self.start()
+        future = Future()
+        # copy: callers hand in reusable buffers (e.g. KeypointRingBuffer.window)
+        self._queue.put((np.array(window, dtype=np.float32), future, time.perf_counter()))
+        return future
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
                 break
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            result = hands.process(frame_rgb)
-            if result.multi_hand_landmarks:
-                for hand_landmarks in result.multi_hand_landmarks:
-                    keypoints = np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark]).flatten()
-                    sequence.append(keypoints)
-            else:
-                sequence.append(np.zeros(21*3))
-    cap.release()
-    return np.array(sequence)
-
-def predict_sign(file):
-    """Predict sign gesture from uploaded video"""
+            if item is None:
+                # finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                preds = self.predict_batch(np.stack([window for window, _, _ in batch]))
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            elapsed = time.perf_counter() - started
+            for (_, future, _), p in zip(batch, preds):
+                future.set_result(p)
+            self._record(len(batch), [started - enqueued for _, _, enqueued in batch], elapsed)
+
+    def _record(self, size, waits, elapsed):
+        STAGE_SECONDS.labels("inference").observe(elapsed)
+        INFERENCE_BATCH_SIZE.observe(size)
+        wait_histogram = INFERENCE_WAIT_SECONDS.labels()
+        for wait in waits:
+            wait_histogram.observe(wait)
+        with self._stats_lock:
+            self._batches += 1
+            self._windows += size
+            self._max_batch_seen = max(self._max_batch_seen, size)
+            self._total_wait += sum(waits)
+            self._max_wait = max(self._max_wait, max(waits))
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+
+    def stats(self):
+        """Batch-size and queue-wait summary since startup"""
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "windows": self._windows,
+                "mean_batch_size": self._windows / self._batches if self._batches else 0.0,
+                "max_batch_size": self._max_batch_seen,
+                "batch_size_counts": dict(sorted(self._batch_sizes.items())),
+                "mean_wait_ms": 1000 * self._total_wait / self._windows if self._windows else 0.0,
+                "max_wait_ms": 1000 * self._max_wait,
+                "queue_depth": self._queue.qsize(),
+            }
+
+
+scheduler = InferenceScheduler(backend.predict)
+
+def top_label(preds):
+    """(label, confidence) of the most likely class in a probability vector"""
+    idx = int(np.argmax(preds))
+    return decode_label(idx), float(preds[idx])
+
+def predict_sequence(seq):
+    """Classify one (SEQ_LENGTH, features) keypoint window"""
+    return top_label(scheduler.submit(seq).result())
+
+async def predict_sequence_async(seq):
+    """Classify one window without blocking the event loop while its batch runs"""
+    preds = await asyncio.wrap_future(scheduler.submit(seq))
+    return top_label(preds)
+
+class SegmentClassifier:
+    """Classifies the candidate segments of one session (see utils/segmenter.py).
+
+    A segment's frames are buffered in a ring of its last SEQ_LENGTH frames,
+    and the finished segment goes to the batching scheduler as one window,
+    so it shares forward passes with every other session. Frames outside
+    segments never reach the model.
+    """
+
+    def __init__(self):
+        self.ring = KeypointRingBuffer(SEQ_LENGTH, INPUT_FEATURES)
+        self.length = 0
+
+    def begin(self):
+        self.length = 0
+        self.ring.reset()
+
+    def extend(self, frames):
+        """Add (n, features) frames to the open segment"""
+        self.ring.push_many(frames)
+        self.length += len(frames)
+
+    async def finish(self):
+        """(label, confidence) for the segment, classified like fit_window(segment)"""
+        if self.length >= SEQ_LENGTH:
+            window = self.ring.window()
+        else:
+            window = fit_window(self.ring.buffer[:self.length])
+        return await predict_sequence_async(window)
+
+def fit_window(seq):
+    """Keep the last SEQ_LENGTH frames of a keypoint sequence, zero-padding short ones"""
+    if seq.shape[0] > SEQ_LENGTH:
+        seq = seq[-SEQ_LENGTH:]
+    elif seq.shape[0] < SEQ_LENGTH:
+        pad = np.zeros((SEQ_LENGTH - seq.shape[0], seq.shape[1]))
+        seq = np.vstack([seq, pad])
+    return seq
+
+def predict_sign(file_or_bytes, holistic=None):
+    """Predict sign gesture from uploaded video (UploadFile, bytes or file path).
+
+    `holistic` is an optional MediaPipe graph held by the caller's session.
+    """
+    from utils.keypoint_utils import extract_keypoints_from_bytes
+    spool = None
     try:
-        # write bytes or file to temp
-        if isinstance(file_or_bytes, (bytes, bytearray)):
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-                tmp.write(file_or_bytes)
-                tmp_path = tmp.name
+        if isinstance(file_or_bytes, str):
+            data, suffix = file_or_bytes, os.path.splitext(file_or_bytes)[1].lower() or ".mp4"
+        elif isinstance(file_or_bytes, (bytes, bytearray)):
+            data, suffix = bytes(file_or_bytes), ".mp4"
         else:
-            # assume UploadFile-like
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp:
-                tmp.write(file_or_bytes.file.read())
-                tmp_path = tmp.name
+            # assume UploadFile-like: copy it to disk in chunks and decode the file
+            suffix = os.path.splitext(file_or_bytes.filename or "")[1].lower() or ".mp4"
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as spool:
+                shutil.copyfileobj(file_or_bytes.file, spool, 256 * 1024)
+            data = spool.name
 
-        seq = extract_keypoints_from_video(tmp_path)
-        os.remove(tmp_path)
+        seq = extract_keypoints_from_bytes(data, suffix, holistic)
 
         if seq.size == 0:
             return "no_hand_detected", None
 
-        # ensure SEQ_LENGTH
-        if seq.shape[0] > SEQ_LENGTH:
-            seq = seq[-SEQ_LENGTH:]
-        elif seq.shape[0] < SEQ_LENGTH:
-            pad = np.zeros((SEQ_LENGTH - seq.shape[0], seq.shape[1]))
-            seq = np.vstack([seq, pad])
-
-        X = np.expand_dims(seq, axis=0)
-        preds = model.predict(X, verbose=0)[0]
-        idx = int(np.argmax(preds))
-        confidence = float(preds[idx])
-
-        # decode label
-        if label_encoder is not None:
-            label = label_encoder.inverse_transform([idx])[0]
-        else:
-            # mapping.json maps index->label (ensure keys are strings in file)
-            label = mapping.get(str(idx), "unknown_sign")
-
-        return label, confidence
+        return predict_sequence(fit_window(seq))
 
     except Exception as e:
         print("Prediction error:", e)
-        return "no_hand_detected", None
\ No newline at end of file
+        return "no_hand_detected", None
+    finally:
+        if spool is not None:
+            os.remove(spool.name)
\ No newline at end of file
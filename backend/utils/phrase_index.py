@@ -0,0 +1,168 @@
+# utils/phrase_index.py
+# Text -> sign playlist without a network call. The sign library (one GIF per
+# sign, named like GOOD-MORNING.gif) is compiled once into a word trie; a
+# sentence is normalized and matched left to right, longest phrase first, so
+#   "Good morning, friends! See you later"
+#   -> GOOD-MORNING, FRIEND, SEE-YOU-LATER
+# in one pass over its words. Words no sign covers are returned as gaps for
+# the caller to rephrase (see gemini_utils.rephrase_for_signs).
+import os
+import re
+import threading
+from collections import namedtuple
+
+SIGN_GIF_DIR = os.getenv(
+    "SIGN_GIF_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                 "frontend", "public", "asl_gifs"),
+)
+
+# Other ways people say a sign: sign name -> phrases
+ALIASES = {
+    "THANKYOU": ["thank you", "thanks"],
+    "HELLO": ["hi", "hey"],
+    "BYE": ["goodbye", "good bye"],
+    "I-AM": ["i am"],
+    "I-LOVE-YOU": ["love you"],
+    "NOT-LIKE": ["do not like", "dislike"],
+    "COME-GO": ["come", "go"],
+    "YES": ["yeah"],
+    "WE": ["us"],
+    "MY": ["mine"],
+    "YOUR": ["yours"],
+}
+# Words ASL gloss leaves out (or signs by pointing); dropped instead of counted as gaps
+FILLER_WORDS = {
+    "a", "an", "the", "is", "are", "am", "be", "was", "were", "to", "of", "do", "does", "did",
+    "and", "or", "but", "so", "for", "with", "in", "on", "at", "it", "this", "that", "i", "me",
+    "will", "can", "just", "very", "really",
+}
+CONTRACTIONS = {"i'm": "i am", "can't": "can not", "won't": "will not", "let's": "let us"}
+
+_WORD = re.compile(r"[a-z']+")
+_END = ""  # trie key of a complete phrase; never a word
+
+# items: ("sign", name) / ("gap", words) in sentence order; signs: the names only;
+# uncovered: the gap phrases; coverage: share of non-filler words matched
+PhrasePlan = namedtuple("PhrasePlan", ["items", "signs", "uncovered", "coverage"])
+
+
+def normalize(text):
+    """Lowercase words with contractions expanded and punctuation / hyphens dropped"""
+    words = []
+    for word in _WORD.findall(text.lower().replace("-", " ").replace("’", "'")):
+        word = CONTRACTIONS.get(word, word)
+        if word.endswith("n't"):
+            word = word[:-3] + " not"
+        words.extend(w for w in word.replace("'s", "").replace("'", "").split() if w)
+    return words
+
+
+def lemmas(word):
+    """The word followed by base-form guesses for plurals, -ing and -ed"""
+    forms = [word]
+    if len(word) > 3:
+        if word.endswith("ies"):
+            forms.append(word[:-3] + "y")
+        if word.endswith("es"):
+            forms.append(word[:-2])
+        if word.endswith("s") and not word.endswith("ss"):
+            forms.append(word[:-1])
+    if len(word) > 4:
+        for suffix in ("ing", "ed"):
+            if word.endswith(suffix):
+                stem = word[:-len(suffix)]
+                forms += [stem, stem + "e"]
+                if len(stem) > 2 and stem[-1] == stem[-2]:
+                    forms.append(stem[:-1])  # sitting -> sit
+    return forms
+
+
+class PhraseIndex:
+    """Word trie over sign names and their aliases with greedy longest-match lookup"""
+
+    def __init__(self, signs=(), aliases=ALIASES):
+        self.root = {}
+        self.signs = set()
+        for sign in signs:
+            self.add(sign.replace("-", " "), sign)
+            for alias in aliases.get(sign, ()):
+                self.add(alias, sign)
+        self._stats = {"requests": 0, "fully_covered": 0, "words": 0, "uncovered_words": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, path=SIGN_GIF_DIR, extension=".gif"):
+        """Index every <SIGN-NAME>.gif in `path` (empty index if it doesn't exist)"""
+        try:
+            names = os.listdir(path)
+        except FileNotFoundError:
+            print(f"[WARNING] Sign directory {path} not found; text-to-sign lookups will all go to the LLM")
+            names = []
+        return cls(sorted(os.path.splitext(n)[0].upper() for n in names if n.lower().endswith(extension)))
+
+    def add(self, phrase, sign):
+        node = self.root
+        for word in normalize(phrase):
+            node = node.setdefault(word, {})
+        node[_END] = sign
+        self.signs.add(sign)
+
+    def _step(self, node, word):
+        for form in lemmas(word):
+            child = node.get(form)
+            if child is not None:
+                return child
+        return None
+
+    def match(self, words, start):
+        """(sign, end) of the longest phrase starting at words[start], or None"""
+        node = self.root
+        best = None
+        for i in range(start, len(words)):
+            node = self._step(node, words[i])
+            if node is None:
+                break
+            if _END in node:
+                best = (node[_END], i + 1)
+        return best
+
+    def translate(self, text, record=True):
+        """Split a sentence into signs and uncovered gaps, in order (`record`: count it in stats)"""
+        words = normalize(text)
+        items, gap = [], []
+        matched = counted = 0
+        i = 0
+        while i < len(words):
+            found = self.match(words, i)
+            if found is not None:
+                sign, end = found
+                if gap:
+                    items.append(("gap", " ".join(gap)))
+                    gap = []
+                items.append(("sign", sign))
+                matched += end - i
+                counted += end - i
+                i = end
+                continue
+            if words[i] not in FILLER_WORDS:
+                gap.append(words[i])
+                counted += 1
+            i += 1
+        if gap:
+            items.append(("gap", " ".join(gap)))
+        uncovered = [value for kind, value in items if kind == "gap"]
+        if record:
+            with self._lock:
+                self._stats["requests"] += 1
+                self._stats["fully_covered"] += not uncovered
+                self._stats["words"] += counted
+                self._stats["uncovered_words"] += counted - matched
+        return PhrasePlan(items, [value for kind, value in items if kind == "sign"], uncovered,
+                          matched / counted if counted else 1.0)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["signs"] = len(self.signs)
+        return stats
@@ -0,0 +1,131 @@
+# utils/roi_tracker.py
+# Runs MediaPipe Holistic on a crop around the signer instead of the whole
+# frame. A full-frame pass every ROI_REFRESH frames (or after the signer is
+# lost) finds the face + upper body + hands box; the frames in between are
+# cropped to it, downscaled to at most ROI_MAX_SIDE pixels and processed on a
+# second graph. Landmarks are mapped back to full-frame normalized
+# coordinates, so keypoint rows keep the layout and scale training used.
+import os
+
+import cv2
+import numpy as np
+
+from mediapipe_utils import FACE_SLICE, LEFT_HAND_SLICE, NUM_FEATURES, POSE_SLICE, RIGHT_HAND_SLICE, \
+    extract_keypoints, mediapipe_process_frame
+
+ROI_REFRESH = int(os.getenv("ROI_REFRESH", 15))        # frames between full-frame passes
+ROI_MARGIN = float(os.getenv("ROI_MARGIN", 0.3))        # box padding, as a fraction of its size
+ROI_MAX_SIDE = int(os.getenv("ROI_MAX_SIDE", 320))      # crops are downscaled to this longest side
+ROI_MAX_AREA = float(os.getenv("ROI_MAX_AREA", 0.7))    # bigger boxes just use the full frame
+ROI_KEEP_IOU = 0.6  # a refreshed box this close to the current one keeps the current one
+ROI_EDGE = 0.03     # a hand this close to the crop border may be leaving it
+
+# upper-body pose landmarks (face, shoulders, arms, hands) that bound the crop
+UPPER_BODY = np.arange(23)
+
+
+def _blocks(row):
+    """(landmarks, fields) views of a keypoint row: pose, face, left hand, right hand"""
+    return (row[POSE_SLICE].reshape(33, 4), row[FACE_SLICE].reshape(468, 3),
+            row[LEFT_HAND_SLICE].reshape(21, 3), row[RIGHT_HAND_SLICE].reshape(21, 3))
+
+
+def signer_box(row, margin=ROI_MARGIN):
+    """Padded (x0, y0, x1, y1) normalized box around face, upper body and hands, or None"""
+    pose, face, left, right = _blocks(row)
+    points = [pose[UPPER_BODY][pose[UPPER_BODY, 3] > 0.5, :2]]
+    for block in (face, left, right):
+        points.append(block[np.any(block != 0, axis=1), :2])
+    points = np.concatenate(points)
+    if len(points) == 0:
+        return None
+    (x0, y0), (x1, y1) = points.min(axis=0), points.max(axis=0)
+    pad_x, pad_y = (x1 - x0) * margin, (y1 - y0) * margin
+    return (max(0.0, x0 - pad_x), max(0.0, y0 - pad_y), min(1.0, x1 + pad_x), min(1.0, y1 + pad_y))
+
+
+def _iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def to_full_frame(row, box):
+    """Map a keypoint row computed on the crop `box` back to full-frame normalized coordinates"""
+    x0, y0, x1, y1 = box
+    width, height = x1 - x0, y1 - y0
+    for block in _blocks(row):
+        present = np.any(block[:, :3] != 0, axis=1)
+        block[present, 0] = x0 + block[present, 0] * width
+        block[present, 1] = y0 + block[present, 1] * height
+        # z shares the x scale (image width)
+        block[present, 2] *= width
+    return row
+
+
+class ROITracker:
+    """Per-session Holistic keypoint extraction on a tracked signer crop.
+
+    `detector` runs the periodic full-frame passes and `tracker` the crops;
+    two graphs, so neither one's landmark tracking sees the coordinate frame
+    jump between full frame and crop.
+    """
+
+    def __init__(self, detector, tracker, refresh=ROI_REFRESH, margin=ROI_MARGIN, max_side=ROI_MAX_SIDE,
+                 max_area=ROI_MAX_AREA):
+        self.detector = detector
+        self.tracker = tracker
+        self.refresh = max(1, refresh)
+        self.margin = margin
+        self.max_side = max_side
+        self.max_area = max_area
+        self.reset()
+
+    def reset(self):
+        self.box = None
+        self._since_full = 0
+        self.full_passes = 0
+        self.crop_passes = 0
+
+    def _full_pass(self, frame, out):
+        extract_keypoints(mediapipe_process_frame(frame, self.detector), out)
+        self.full_passes += 1
+        self._since_full = 0
+        box = signer_box(out, self.margin)
+        if box is None or (box[2] - box[0]) * (box[3] - box[1]) > self.max_area:
+            self.box = None
+        elif self.box is None or _iou(box, self.box) < ROI_KEEP_IOU:
+            self.box = box
+        return out
+
+    def extract(self, frame, out=None):
+        """Keypoint row (NUM_FEATURES, float32) for one BGR frame, in full-frame coordinates"""
+        if out is None:
+            out = np.zeros(NUM_FEATURES, dtype=np.float32)
+        self._since_full += 1
+        if self.box is None or self._since_full >= self.refresh:
+            return self._full_pass(frame, out)
+
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = self.box
+        left, top = int(x0 * w), int(y0 * h)
+        right, bottom = max(left + 1, int(np.ceil(x1 * w))), max(top + 1, int(np.ceil(y1 * h)))
+        crop = frame[top:bottom, left:right]
+        scale = self.max_side / max(crop.shape[:2])
+        if scale < 1:
+            crop = cv2.resize(crop, (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale))),
+                              interpolation=cv2.INTER_AREA)
+        extract_keypoints(mediapipe_process_frame(crop, self.tracker), out)
+        self.crop_passes += 1
+        pose, face, left_hand, right_hand = _blocks(out)
+        if not (np.any(left_hand) or np.any(right_hand) or np.any(face)):
+            # signer lost in the crop: look at the whole frame now
+            return self._full_pass(frame, out)
+        for hand in (left_hand, right_hand):
+            xy = hand[np.any(hand != 0, axis=1), :2]
+            if len(xy) and (xy.min() < ROI_EDGE or xy.max() > 1 - ROI_EDGE):
+                # a hand is leaving the crop: refresh the box on the next frame
+                self._since_full = self.refresh
+        return to_full_frame(out, (left / w, top / h, right / w, bottom / h))
@@ -0,0 +1,133 @@
+# utils/segmenter.py
+# Splits a live keypoint stream into candidate signs and sentence pauses from
+# hand motion alone. Each frame costs one small vector difference; the
+# classifier only needs to run on the segments this emits, and pauses are
+# counted in frames, so sentence boundaries don't depend on message timing.
+#
+#   segmenter = MotionSegmenter(HAND_FEATURES)
+#   for kind, value in segmenter.push_many(frames):
+#       "start"   value = first frames of a candidate sign (with pre-roll)
+#       "frames"  value = further frames of the open candidate
+#       "end"     value = length of the finished candidate
+#       "discard" value = length of a candidate too short to be a sign
+#       "pause"   value = None; hands idle long enough to close the sentence
+import os
+from collections import deque
+
+import numpy as np
+
+# RMS per-frame displacement of the hand landmarks (x, y in normalized image
+# units). Recorded signs move at ~0.011 median, 0.0045 at the 25th percentile.
+START_SPEED = float(os.getenv("SEGMENT_START_SPEED", 0.006))
+END_SPEED = float(os.getenv("SEGMENT_END_SPEED", 0.003))
+SMOOTHING = float(os.getenv("SEGMENT_SMOOTHING", 0.5))      # EMA weight of the newest frame
+START_FRAMES = int(os.getenv("SEGMENT_START_FRAMES", 2))    # frames above START_SPEED to open a segment
+END_FRAMES = int(os.getenv("SEGMENT_END_FRAMES", 6))        # frames below END_SPEED to close it
+MIN_FRAMES = int(os.getenv("SEGMENT_MIN_FRAMES", 8))        # shorter candidates are twitches
+MAX_FRAMES = int(os.getenv("SEGMENT_MAX_FRAMES", 90))       # force a boundary in continuous motion
+PRE_ROLL = int(os.getenv("SEGMENT_PRE_ROLL", 4))            # frames kept from before the onset
+PAUSE_FRAMES = int(os.getenv("SEGMENT_PAUSE_FRAMES", 60))   # idle frames (2 s at 30 fps) that end a sentence
+
+HAND_LANDMARKS = 21
+
+
+class MotionSegmenter:
+    """Hysteresis segmenter over the smoothed hand speed of a keypoint stream.
+
+    A segment opens once the speed stays above `start_speed` for
+    `start_frames` frames and closes once it stays below `end_speed` for
+    `end_frames`; the gap between the two thresholds keeps a sign from
+    flickering open and shut. After `pause_frames` idle frames following at
+    least one sign, a pause is emitted.
+    """
+
+    def __init__(self, hand_features=HAND_LANDMARKS * 3 * 2, start_speed=START_SPEED, end_speed=END_SPEED,
+                 smoothing=SMOOTHING, start_frames=START_FRAMES, end_frames=END_FRAMES, min_frames=MIN_FRAMES,
+                 max_frames=MAX_FRAMES, pre_roll=PRE_ROLL, pause_frames=PAUSE_FRAMES):
+        self.hand_features = hand_features
+        self.hands = max(1, hand_features // (HAND_LANDMARKS * 3))
+        self.start_speed = start_speed
+        self.end_speed = end_speed
+        self.smoothing = smoothing
+        self.start_frames = max(1, start_frames)
+        self.end_frames = max(1, end_frames)
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+        self.pause_frames = pause_frames
+        self._recent = deque(maxlen=max(0, pre_roll) + self.start_frames)
+        self.reset()
+
+    def reset(self):
+        self._previous = None    # (hands, landmarks, 2) of the last frame
+        self._present = None     # which hands the last frame had
+        self.speed = 0.0         # smoothed hand speed
+        self.active = False
+        self.length = 0          # frames in the open segment
+        self._run = 0            # consecutive frames past the threshold being watched
+        self._idle = 0           # frames since the last segment closed
+        self._signs = 0          # segments since the last pause
+        self.idle_frames = 0     # frames that opened no segment, for metrics
+        self._recent.clear()
+
+    def _hand_speed(self, frame):
+        """RMS x/y displacement of the hands visible in this and the previous frame"""
+        hands = np.asarray(frame[-self.hand_features:], dtype=np.float32)
+        hands = hands[:self.hands * HAND_LANDMARKS * 3].reshape(self.hands, HAND_LANDMARKS, 3)[..., :2]
+        present = np.any(hands != 0, axis=(1, 2))
+        speed = 0.0
+        if self._previous is not None:
+            both = present & self._present
+            if both.any():
+                delta = hands[both] - self._previous[both]
+                speed = float(np.sqrt((delta * delta).mean(axis=(1, 2)).max()))
+        self._previous, self._present = hands, present
+        return speed
+
+    def push(self, frame):
+        """Advance by one frame; returns (kind, value) events, usually none"""
+        self.speed += self.smoothing * (self._hand_speed(frame) - self.speed)
+        events = []
+        if not self.active:
+            self._recent.append(frame)
+            self._run = self._run + 1 if self.speed >= self.start_speed else 0
+            if self._run >= self.start_frames:
+                self.active = True
+                self.length = len(self._recent)
+                self._run = 0
+                events.append(("start", np.array(self._recent, dtype=np.float32)))
+                self._recent.clear()
+            else:
+                self._idle += 1
+                self.idle_frames += 1
+                if self._idle == self.pause_frames and self._signs:
+                    self._signs = 0
+                    events.append(("pause", None))
+            return events
+
+        self.length += 1
+        events.append(("frames", np.asarray(frame, dtype=np.float32)[None]))
+        self._run = self._run + 1 if self.speed < self.end_speed else 0
+        if self._run >= self.end_frames or self.length >= self.max_frames:
+            if self.length >= self.min_frames:
+                events.append(("end", self.length))
+                self._signs += 1
+                self._idle = 0
+            else:
+                events.append(("discard", self.length))
+            self.active = False
+            self.length = 0
+            self._run = 0
+        return events
+
+    def push_many(self, frames):
+        """Advance through (n, features) frames; consecutive "frames" events are merged"""
+        events = []
+        for frame in frames:
+            for kind, value in self.push(frame):
+                if kind == "frames" and events and events[-1][0] in ("start", "frames"):
+                    events[-1][1].append(value)
+                elif kind in ("start", "frames"):
+                    events.append((kind, [value]))
+                else:
+                    events.append((kind, value))
+        return [(kind, np.concatenate(value) if kind in ("start", "frames") else value) for kind, value in events]
@@ -0,0 +1,376 @@
+# utils/shard_utils.py
+# Packed dataset shard: every recorded sequence's frames back to back in one
+# float32 file plus a fixed-width index of (label, offset, length) records.
+#   <shard>/frames.f32  raw little-endian float32, (total_frames, num_features)
+#   <shard>/index.bin   INDEX_DTYPE records, one per sequence
+#   <shard>/meta.json   {"num_features": ..., "labels": [...]}
+#   <shard>/manifest.json  source file stats + content hashes (sync_directory)
+# Readers memory-map the frames, so opening a shard costs one small index
+# read and every sequence is a zero-copy view. Writers append the frames
+# first and the index record last: a crash mid-append leaves unindexed
+# trailing frames, which the next append overwrites.
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SHARD_DIR = "dataset.shard"
+FRAMES_FILE = "frames.f32"
+INDEX_FILE = "index.bin"
+META_FILE = "meta.json"
+MANIFEST_FILE = "manifest.json"
+COMPACT_RATIO = 0.5  # rewrite the shard once this share of its frames is superseded
+FRAME_DTYPE = np.dtype("<f4")
+INDEX_DTYPE = np.dtype([("label", "<i4"), ("length", "<i4"), ("offset", "<i8")])
+
+
+def _write_json(path, data):
+    """Atomically replace a small JSON file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_index(path):
+    """Every complete record in an index file (a torn trailing record is ignored)"""
+    index_path = os.path.join(path, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return np.zeros(0, dtype=INDEX_DTYPE)
+    count = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+    return np.fromfile(index_path, dtype=INDEX_DTYPE, count=count)
+
+
+class ShardWriter:
+    """Appends labelled keypoint sequences to a shard, creating it if needed.
+
+    One writer per shard at a time (e.g. the recorder, or a dataset build).
+    """
+
+    def __init__(self, path=SHARD_DIR, num_features=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+            if num_features is not None and num_features != self.meta["num_features"]:
+                raise ValueError(f"shard {path} holds {self.meta['num_features']} features per frame, not {num_features}")
+        elif num_features is None:
+            raise ValueError("num_features is required to create a new shard")
+        else:
+            self.meta = {"num_features": int(num_features), "labels": []}
+            _write_json(meta_path, self.meta)
+        self.num_features = self.meta["num_features"]
+        self._label_ids = {label: i for i, label in enumerate(self.meta["labels"])}
+
+        index = _read_index(path)
+        self.count = len(index)
+        self.frame_count = int(index["offset"][-1] + index["length"][-1]) if self.count else 0
+        # drop a torn index record and any frames no record points at
+        index_path = os.path.join(path, INDEX_FILE)
+        with open(index_path, "ab") as f:
+            f.truncate(self.count * INDEX_DTYPE.itemsize)
+        frames_path = os.path.join(path, FRAMES_FILE)
+        self._frames = open(frames_path, "r+b" if os.path.exists(frames_path) else "w+b")
+        self._frames.truncate(self.frame_count * self.num_features * FRAME_DTYPE.itemsize)
+        self._frames.seek(0, os.SEEK_END)
+        self._index = open(index_path, "ab")
+
+    def label_id(self, label):
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self.meta["labels"])
+            self.meta["labels"].append(label)
+            _write_json(os.path.join(self.path, META_FILE), self.meta)
+        return label_id
+
+    def append(self, label, frames):
+        """Append one (frames, num_features) sequence; returns its record number"""
+        frames = np.ascontiguousarray(frames, dtype=FRAME_DTYPE)
+        if frames.ndim != 2 or frames.shape[1] != self.num_features:
+            raise ValueError(f"expected (frames, {self.num_features}) keypoints, got {frames.shape}")
+        record = np.array([(self.label_id(label), len(frames), self.frame_count)], dtype=INDEX_DTYPE)
+        self._frames.write(frames.data)
+        self._frames.flush()
+        self._index.write(record.data)
+        self._index.flush()
+        self.frame_count += len(frames)
+        self.count += 1
+        return self.count - 1
+
+    def close(self):
+        self._frames.close()
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Shard:
+    """Read-only view of a shard; frames are memory-mapped, not loaded"""
+
+    def __init__(self, path=SHARD_DIR):
+        self.path = path
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.num_features = meta["num_features"]
+        self.labels = meta["labels"]
+        self.index = _read_index(path)
+        frame_count = int(self.index["offset"][-1] + self.index["length"][-1]) if len(self.index) else 0
+        if frame_count:
+            self.frames = np.memmap(os.path.join(path, FRAMES_FILE), dtype=FRAME_DTYPE, mode="r",
+                                    shape=(frame_count, self.num_features))
+        else:
+            self.frames = np.zeros((0, self.num_features), dtype=FRAME_DTYPE)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def lengths(self):
+        return self.index["length"]
+
+    @property
+    def label_ids(self):
+        return self.index["label"]
+
+    def sequence(self, i):
+        """Frames of record `i` as a view into the memory map"""
+        offset, length = int(self.index["offset"][i]), int(self.index["length"][i])
+        return self.frames[offset:offset + length]
+
+    def windows(self, seq_length, records=None, out=None):
+        """(records, seq_length, num_features) float32 batch, truncated or zero-padded at the end"""
+        records = np.arange(len(self)) if records is None else np.asarray(records)
+        if out is None:
+            out = np.empty((len(records), seq_length, self.num_features), dtype=FRAME_DTYPE)
+        for row, i in enumerate(records):
+            seq = self.sequence(i)[:seq_length]
+            out[row, :len(seq)] = seq
+            out[row, len(seq):] = 0
+        return out
+
+
+# --------------- INCREMENTAL BUILDS ---------------
+
+def load_manifest(path=SHARD_DIR):
+    """{"files": {relpath: {size, mtime_ns, sha1, record}}, "dead": [record...], "hashes": [sha1 per record]}"""
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}, "dead": [], "hashes": []}
+
+
+def _load_source(file_path):
+    """Worker: read one recording, returning its content hash and float32 frames"""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return hashlib.sha1(data).hexdigest(), np.load(io.BytesIO(data)).astype(FRAME_DTYPE)
+
+
+def _frames_hash(frames):
+    """Content hash of one record's float32 frames (the split key of every record)"""
+    return hashlib.sha1(np.ascontiguousarray(frames, dtype=FRAME_DTYPE).data).hexdigest()
+
+
+def _adopt_records(path, manifest):
+    """Hash records the manifest doesn't know yet, e.g. ones the recorder appended
+    with ShardWriter.append. They get no file entry, so no sync marks them dead."""
+    if not os.path.exists(os.path.join(path, META_FILE)):
+        return
+    shard = Shard(path)
+    hashes = manifest["hashes"]
+    for i in range(len(hashes), len(shard)):
+        hashes.append(_frames_hash(shard.sequence(i)))
+
+
+def _unsourced_records(path, manifest):
+    """(label, frame hash) -> record number, for live records no dataset file maps to"""
+    if not manifest["hashes"]:
+        return {}
+    shard = Shard(path)
+    sourced = {entry["record"] for entry in manifest["files"].values()} | set(manifest["dead"])
+    return {(shard.labels[shard.label_ids[i]], h): i for i, h in enumerate(manifest["hashes"]) if i not in sourced}
+
+
+def _scan(data_dir):
+    """relpath -> (action, full path, size, mtime_ns) for every dataset/<action>/<seq>.npy"""
+    found = {}
+    for action in sorted(os.listdir(data_dir)):
+        action_dir = os.path.join(data_dir, action)
+        if not os.path.isdir(action_dir):
+            continue
+        for entry in sorted(os.scandir(action_dir), key=lambda e: e.name):
+            if entry.name.endswith(".npy"):
+                st = entry.stat()
+                found[f"{action}/{entry.name}"] = (action, entry.path, st.st_size, st.st_mtime_ns)
+    return found
+
+
+def sync_directory(data_dir, path=SHARD_DIR, workers=None):
+    """Bring a shard up to date with a dataset/<action>/<seq>.npy tree.
+
+    Only files whose size or mtime changed since the last sync are read
+    (in a process pool), and only those whose content hash changed are
+    appended. Records of changed or deleted files are marked dead and the
+    shard is compacted once dead frames pass COMPACT_RATIO. Records without
+    a source file (appended by the recorder, or packed before manifests
+    existed) are kept; a new file with the same frames as one of them is
+    mapped to it instead of appended again. Returns counts of added /
+    changed / removed / unchanged files.
+    """
+    manifest = load_manifest(path)
+    _adopt_records(path, manifest)
+    unsourced = _unsourced_records(path, manifest)
+    files = manifest["files"]
+    found = _scan(data_dir)
+    todo = [rel for rel, (_, _, size, mtime) in found.items()
+            if rel not in files or (files[rel]["size"], files[rel]["mtime_ns"]) != (size, mtime)]
+    removed = [rel for rel in files if rel not in found]
+    counts = {"added": 0, "changed": 0, "removed": len(removed), "unchanged": len(found) - len(todo)}
+
+    writer = None
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            loaded = pool.map(_load_source, [found[rel][1] for rel in todo], chunksize=16)
+            for rel, (sha1, seq) in zip(todo, loaded):
+                action, _, size, mtime = found[rel]
+                old = files.get(rel)
+                if old is not None and old["sha1"] == sha1:
+                    # touched, not changed
+                    old.update(size=size, mtime_ns=mtime)
+                    counts["unchanged"] += 1
+                    continue
+                record = unsourced.pop((action, _frames_hash(seq)), None) if old is None else None
+                if record is None:
+                    if writer is None:
+                        writer = ShardWriter(path, seq.shape[1])
+                    if old is not None:
+                        manifest["dead"].append(old["record"])
+                    record = writer.append(action, seq)
+                files[rel] = {"size": size, "mtime_ns": mtime, "sha1": sha1, "record": record}
+                counts["changed" if old is not None else "added"] += 1
+    if writer is not None:
+        writer.close()
+    for rel in removed:
+        manifest["dead"].append(files.pop(rel)["record"])
+
+    _adopt_records(path, manifest)
+    if os.path.exists(os.path.join(path, META_FILE)):
+        shard = Shard(path)
+        dead_frames = int(shard.lengths[manifest["dead"]].sum()) if manifest["dead"] else 0
+        if dead_frames > COMPACT_RATIO * len(shard.frames):
+            del shard
+            manifest = compact(path, manifest)
+    os.makedirs(path, exist_ok=True)
+    _write_json(os.path.join(path, MANIFEST_FILE), manifest)
+    return counts
+
+
+def live_records(path=SHARD_DIR, manifest=None):
+    """Record numbers not superseded by a newer version of their source"""
+    manifest = load_manifest(path) if manifest is None else manifest
+    shard_size = len(_read_index(path))
+    return np.setdiff1d(np.arange(shard_size), np.asarray(manifest["dead"], dtype=np.int64))
+
+
+def compact(path=SHARD_DIR, manifest=None):
+    """Rewrite a shard with only its live records; returns the renumbered manifest"""
+    manifest = load_manifest(path) if manifest is None else manifest
+    shard = Shard(path)
+    tmp_path = path.rstrip("/\\") + ".compacting"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    renumbered = {}
+    with ShardWriter(tmp_path, shard.num_features) as writer:
+        for label in shard.labels:
+            writer.label_id(label)
+        for old in live_records(path, manifest):
+            renumbered[int(old)] = writer.append(shard.labels[shard.label_ids[old]], shard.sequence(old))
+    hashes = [manifest["hashes"][old] for old in renumbered]
+    files = {rel: dict(entry, record=renumbered[entry["record"]]) for rel, entry in manifest["files"].items()}
+    manifest = {"files": files, "dead": [], "hashes": hashes}
+    _write_json(os.path.join(tmp_path, MANIFEST_FILE), manifest)
+    del shard
+    shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def pack_directory(data_dir, path=SHARD_DIR, workers=None):
+    """Build a fresh shard from a dataset/<action>/<seq>.npy tree; returns its record count.
+
+    Records of the old shard without a source file (see sync_directory) are
+    copied into the new one first, so rebuilding never loses recordings.
+    """
+    kept = []
+    if os.path.exists(os.path.join(path, META_FILE)):
+        manifest = load_manifest(path)
+        _adopt_records(path, manifest)
+        shard = Shard(path)
+        kept = [(shard.labels[shard.label_ids[i]], np.array(shard.sequence(i)))
+                for i in sorted(_unsourced_records(path, manifest).values())]
+        del shard
+    shutil.rmtree(path, ignore_errors=True)
+    if kept:
+        with ShardWriter(path, kept[0][1].shape[1]) as writer:
+            for label, seq in kept:
+                writer.append(label, seq)
+        print(f"[INFO] Kept {len(kept)} sequences in {path} that have no file in {data_dir}")
+    sync_directory(data_dir, path, workers)
+    return len(live_records(path))
+
+
+def stable_split(hashes, labels, val_fraction):
+    """Boolean validation mask, stratified by label and ordered by content hash.
+
+    Within each label the records with the lowest hashes go to validation,
+    ceil(val_fraction * n) of them (but never the label's last training
+    record). The order doesn't depend on file names or load order, so adding
+    a recording moves at most one existing record of its label between splits.
+    """
+    hashes = np.asarray(hashes)
+    labels = np.asarray(labels)
+    is_val = np.zeros(len(hashes), dtype=bool)
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        members = members[np.argsort(hashes[members], kind="stable")]
+        count = min(int(np.ceil(val_fraction * len(members))), len(members) - 1)
+        is_val[members[:count]] = True
+    return is_val
+
+
+def _fill_windows(path, records, out_path, start, seq_length):
+    """Worker: pad/truncate `records` into rows start.. of an .npy opened as a memmap"""
+    out = np.lib.format.open_memmap(out_path, mode="r+")
+    Shard(path).windows(seq_length, records, out=out[start:start + len(records)])
+    out.flush()
+
+
+def export_windows(path, records, out_path, seq_length, workers=None, chunk=256):
+    """Write (len(records), seq_length, features) float32 windows to `out_path` (.npy).
+
+    The output is preallocated on disk and filled by a process pool, one
+    chunk of rows per task.
+    """
+    records = np.asarray(records)
+    num_features = Shard(path).num_features
+    np.lib.format.open_memmap(out_path, mode="w+", dtype=FRAME_DTYPE,
+                              shape=(len(records), seq_length, num_features)).flush()
+    if len(records) == 0:
+        return out_path
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(_fill_windows, path, records[i:i + chunk], out_path, i, seq_length)
+                for i in range(0, len(records), chunk)]
+        for job in jobs:
+            job.result()
+    return out_path
@@ -0,0 +1,94 @@
+# utils/train_utils.py
+# Training input pipeline that streams X_*.npy from disk instead of loading
+# them: normalization stats come from one chunked pass, and batches are read
+# from memory-mapped arrays through a shuffle buffer and prefetched by
+# tf.data. Memory stays flat as the dataset grows.
+#
+#   stats = normalization_stats(np.load("X_train.npy", mmap_mode="r"))
+#   save_stats(stats, "model_best.keras")   # -> model_best.norm.npz, loaded by ml_utils
+#   train = make_dataset("X_train.npy", "y_train.npy", 8, stats, shuffle=True)
+#   val = make_dataset("X_val.npy", "y_val.npy", 8, stats)
+#   model.fit(train, validation_data=val, ...)
+import os
+
+import numpy as np
+
+from utils.inference_backends import save_normalization
+
+SHUFFLE_BUFFER = 1024  # samples held in memory for shuffling
+STATS_CHUNK = 64       # samples per block while computing stats
+MIN_STD = 1e-6         # (near-)constant features are only centred, not scaled
+
+
+def normalization_stats(X, chunk=STATS_CHUNK):
+    """Per-feature mean and std over every frame of a (samples, frames, features) array.
+
+    One pass over `chunk`-sample blocks (works on a memmap), merging block
+    moments with Chan's parallel update in float64.
+    """
+    num_features = X.shape[-1]
+    count = 0
+    mean = np.zeros(num_features)
+    m2 = np.zeros(num_features)
+    for start in range(0, len(X), chunk):
+        block = np.asarray(X[start:start + chunk], dtype=np.float64).reshape(-1, num_features)
+        n = len(block)
+        block_mean = block.mean(axis=0)
+        block_m2 = ((block - block_mean) ** 2).sum(axis=0)
+        delta = block_mean - mean
+        total = count + n
+        mean += delta * n / total
+        m2 += block_m2 + delta ** 2 * count * n / total
+        count = total
+    std = np.sqrt(m2 / max(count, 1))
+    std = np.where(std > MIN_STD, std, 1.0)
+    return mean.astype(np.float32), std.astype(np.float32)
+
+
+def save_stats(stats, model_path="model_best.keras"):
+    """Save (mean, std) next to the model, where inference picks them up"""
+    return save_normalization(os.path.splitext(model_path)[0] + ".norm.npz", *stats)
+
+
+def iter_batches(X, y, batch_size, stats=None, shuffle=False, shuffle_buffer=SHUFFLE_BUFFER, rng=None):
+    """Yield normalized float32 (x, y) batches from (memory-mapped) arrays.
+
+    With `shuffle`, contiguous blocks of `shuffle_buffer` samples are read in
+    random order and shuffled within, so disk reads stay sequential and only
+    one block is in memory.
+    """
+    rng = rng or np.random.default_rng()
+    if stats is not None:
+        mean, std = stats
+        inv_std = 1.0 / std
+    blocks = np.arange(0, len(X), shuffle_buffer)
+    if shuffle:
+        rng.shuffle(blocks)
+    for start in blocks:
+        xb = np.array(X[start:start + shuffle_buffer], dtype=np.float32)
+        yb = np.array(y[start:start + shuffle_buffer], dtype=np.float32)
+        if stats is not None:
+            xb -= mean
+            xb *= inv_std
+        order = rng.permutation(len(xb)) if shuffle else np.arange(len(xb))
+        for i in range(0, len(order), batch_size):
+            rows = order[i:i + batch_size]
+            yield xb[rows], yb[rows]
+
+
+def make_dataset(x_path, y_path, batch_size, stats=None, shuffle=False, shuffle_buffer=SHUFFLE_BUFFER, seed=None):
+    """tf.data pipeline over memory-mapped .npy files, reshuffled every epoch and prefetched"""
+    import tensorflow as tf
+
+    X = np.load(x_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+    rng = np.random.default_rng(seed)
+    signature = (
+        tf.TensorSpec((None,) + X.shape[1:], tf.float32),
+        tf.TensorSpec((None,) + y.shape[1:], tf.float32),
+    )
+    dataset = tf.data.Dataset.from_generator(
+        lambda: iter_batches(X, y, batch_size, stats, shuffle, shuffle_buffer, rng),
+        output_signature=signature,
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,104 @@
+# utils/transcription.py
+# Whole-video transcription: a SEQ_LENGTH window slides over the keypoints of
+# an uploaded video `stride` frames at a time, every window is classified,
+# and runs of windows with the same label are merged into one record
+#   {"start": 1.2, "end": 2.6, "sign": "HELLO", "confidence": 0.91}
+# (seconds from the start of the video). Long videos are cut into time
+# chunks so several keypoint workers can extract them at once; the chunks'
+# keypoints are fed back in order, so windows freely span chunk boundaries.
+import os
+
+import numpy as np
+
+TRANSCRIBE_STRIDE = int(os.getenv("TRANSCRIBE_STRIDE", 5))                       # frames between windows
+TRANSCRIBE_CHUNK_SECONDS = float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", 4))       # per keypoint job
+TRANSCRIBE_MIN_CONFIDENCE = float(os.getenv("TRANSCRIBE_MIN_CONFIDENCE", 0.5))  # weaker windows are gaps
+DEFAULT_FPS = 30.0
+
+
+def chunk_ranges(start, duration, chunk_seconds=TRANSCRIBE_CHUNK_SECONDS):
+    """[(start, end)] time ranges covering a video; the last one is open-ended
+    (end None) so frames past a slightly short duration aren't lost"""
+    if not duration or chunk_seconds <= 0:
+        return [(0.0, None)]
+    count = max(1, int(np.ceil(duration / chunk_seconds)))
+    bounds = [start + i * chunk_seconds for i in range(count)]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+class WindowSlider:
+    """Cuts (SEQ_LENGTH, features) windows from keypoints added chunk by chunk.
+
+    Only rows a future window still needs are kept.
+    """
+
+    def __init__(self, seq_length, stride=TRANSCRIBE_STRIDE, fps=None):
+        self.seq_length = seq_length
+        self.stride = max(1, stride)
+        self.frame_seconds = 1.0 / (fps or DEFAULT_FPS)
+        self.rows = None
+        self.times = np.zeros(0)
+        self._offset = 0  # video frame index of rows[0]
+        self._next = 0    # video frame index of the next window's first frame
+        self.frames = 0
+
+    def add(self, rows, times):
+        """Append a chunk's keypoints and frame times; returns the windows now complete"""
+        if len(rows):
+            self.rows = rows if self.rows is None else np.concatenate([self.rows, rows])
+            self.times = np.concatenate([self.times, times])
+            self.frames += len(rows)
+        return self._cut()
+
+    def finish(self):
+        """The zero-padded window of a video shorter than one window, if any"""
+        if self.rows is None or self._next > 0 or self.frames >= self.seq_length:
+            return []
+        window = np.zeros((self.seq_length, self.rows.shape[1]), dtype=np.float32)
+        window[:len(self.rows)] = self.rows
+        self._next = self.frames
+        return [(float(self.times[0]), float(self.times[-1]) + self.frame_seconds, window)]
+
+    def _cut(self):
+        windows = []
+        while self._next + self.seq_length <= self.frames:
+            i = self._next - self._offset
+            window = self.rows[i:i + self.seq_length]
+            windows.append((float(self.times[i]), float(self.times[i + self.seq_length - 1]) + self.frame_seconds,
+                            window))
+            self._next += self.stride
+        drop = min(self._next, self.frames) - self._offset
+        if drop > 0:
+            self.rows = self.rows[drop:]
+            self.times = self.times[drop:]
+            self._offset += drop
+        return windows
+
+
+class LabelMerger:
+    """Merges consecutive same-label windows into records.
+
+    A window labelled None (no hands, or under the confidence threshold)
+    closes the open record. `add` and `flush` return the records finished.
+    """
+
+    def __init__(self):
+        self._open = None  # [start, end, sign, confidences]
+
+    def add(self, start, end, sign, confidence=None):
+        if self._open is not None and sign == self._open[2]:
+            self._open[1] = end
+            self._open[3].append(confidence)
+            return []
+        finished = self.flush()
+        if sign is not None:
+            self._open = [start, end, sign, [confidence]]
+        return finished
+
+    def flush(self):
+        if self._open is None:
+            return []
+        start, end, sign, confidences = self._open
+        self._open = None
+        return [{"start": round(start, 3), "end": round(end, 3), "sign": sign,
+                 "confidence": round(float(np.mean(confidences)), 4)}]
@@ -0,0 +1,169 @@
+# utils/uploads.py
+# Streams an uploaded video to a spool file in UPLOAD_DIR as the request body
+# arrives, so memory per upload stays at one received chunk whatever the file
+# size, and limits are enforced before the rest of the body is read:
+#   declared Content-Length over the limit  -> 413 before reading anything
+#   bad extension / content type            -> 415 as soon as the headers are in
+#   body growing past the limit             -> 413 mid-stream
+# Accepts multipart/form-data with the video in one field (default "file") or
+# a raw body with a video/* Content-Type (filename from ?filename=). Keypoint
+# workers then open the spool file by path; nothing is copied between processes.
+import os
+import tempfile
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # older python-multipart
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# content type -> extension, for raw uploads without a filename
+VIDEO_CONTENT_TYPES = {
+    "video/mp4": ".mp4",
+    "video/webm": ".webm",
+    "video/quicktime": ".mov",
+    "video/x-msvideo": ".avi",
+}
+GENERIC_CONTENT_TYPES = {"", "application/octet-stream"}
+
+
+class UploadRejected(Exception):
+    """Raised while receiving an upload that breaks a limit; `status_code` is the HTTP status to answer with"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class SpooledVideo:
+    """An upload written to disk: pass `path` to the decoder, `remove` it when done"""
+
+    def __init__(self, directory, suffix, content_type):
+        fd, self.path = tempfile.mkstemp(prefix="upload-", suffix=suffix, dir=directory)
+        self.file = os.fdopen(fd, "wb")
+        self.suffix = suffix
+        self.content_type = content_type
+        self.size = 0
+
+    def write(self, data, max_bytes):
+        self.size += len(data)
+        if self.size > max_bytes:
+            raise UploadRejected(413, f"Upload exceeds {max_bytes / (1024 * 1024):.3g} MB")
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+    def remove(self):
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def video_suffix(filename, content_type, allowed_extensions):
+    """File extension to decode the upload with; UploadRejected(415) if it isn't an allowed video"""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type not in GENERIC_CONTENT_TYPES and not content_type.startswith("video/"):
+        raise UploadRejected(415, f"Unsupported content type {content_type!r}; expected a video")
+    suffix = os.path.splitext(filename or "")[1].lower() or VIDEO_CONTENT_TYPES.get(content_type, ".mp4")
+    if suffix not in allowed_extensions:
+        raise UploadRejected(415, f"Unsupported file type {suffix!r}; allowed: {', '.join(sorted(allowed_extensions))}")
+    return suffix
+
+
+async def _spool_raw(request, content_type, max_bytes, allowed_extensions, directory):
+    suffix = video_suffix(request.query_params.get("filename"), content_type, allowed_extensions)
+    upload = SpooledVideo(directory, suffix, content_type)
+    try:
+        async for chunk in request.stream():
+            upload.write(chunk, max_bytes)
+    except BaseException:
+        upload.remove()
+        raise
+    upload.close()
+    return upload
+
+
+async def _spool_multipart(request, boundary, max_bytes, allowed_extensions, directory, field):
+    state = {"headers": {}, "header": b"", "target": False, "upload": None, "error": None}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["target"] = False
+
+    def on_header_field(data, start, end):
+        state["header"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        name = state["header"].lower()
+        state["headers"][name] = state["headers"].get(name, b"") + data[start:end]
+
+    def on_header_end():
+        state["header"] = b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode() != field or state["upload"] is not None:
+            return
+        filename = options.get(b"filename", b"").decode("utf-8", "replace")
+        content_type = state["headers"].get(b"content-type", b"").decode("latin-1")
+        try:
+            suffix = video_suffix(filename, content_type, allowed_extensions)
+        except UploadRejected as e:
+            state["error"] = e
+            return
+        state["upload"] = SpooledVideo(directory, suffix, content_type)
+        state["target"] = True
+
+    def on_part_data(data, start, end):
+        if state["target"] and state["error"] is None:
+            try:
+                state["upload"].write(data[start:end], max_bytes)
+            except UploadRejected as e:
+                state["error"] = e
+
+    def on_part_end():
+        state["target"] = False
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if state["error"] is not None:
+                raise state["error"]
+        parser.finalize()
+        if state["upload"] is None:
+            raise UploadRejected(400, f"Missing form field {field!r}")
+    except BaseException:
+        if state["upload"] is not None:
+            state["upload"].remove()
+        raise
+    state["upload"].close()
+    return state["upload"]
+
+
+async def receive_video(request, max_bytes, allowed_extensions, directory, field="file"):
+    """Spool the request's video upload to `directory` while checking its size and type.
+
+    Returns a SpooledVideo; raises UploadRejected with 400, 413 or 415.
+    """
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > max_bytes + 64 * 1024:
+        # (64 KB of slack for multipart boundaries and part headers)
+        raise UploadRejected(413, f"Upload exceeds {max_bytes / (1024 * 1024):.3g} MB")
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type == b"multipart/form-data":
+        if b"boundary" not in options:
+            raise UploadRejected(400, "multipart body without a boundary")
+        return await _spool_multipart(request, options[b"boundary"], max_bytes, allowed_extensions, directory, field)
+    return await _spool_raw(request, content_type.decode("latin-1"), max_bytes, allowed_extensions, directory)
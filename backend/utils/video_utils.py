@@ -0,0 +1,185 @@
+# utils/video_utils.py
+# Decode uploaded / streamed video straight from memory. Every `data` argument
+# may also be the path of a video file (e.g. a spooled upload, see uploads.py).
+import io
+import os
+import tempfile
+
+import cv2
+
+try:
+    import av  # PyAV: in-memory container demuxing via FFmpeg
+except ImportError:
+    av = None
+
+
+def _open_container(data):
+    return av.open(data if isinstance(data, str) else io.BytesIO(data), mode="r")
+
+
+def iter_frames_in_memory(data):
+    """Yield BGR frames decoded from encoded video bytes without touching disk.
+
+    Raises ValueError if PyAV is missing or the bytes are not a container it
+    can open; errors part-way through a stream (e.g. a truncated chunk) just
+    end the iteration.
+    """
+    if av is None:
+        raise ValueError("PyAV not installed")
+    try:
+        container = _open_container(data)
+    except Exception as e:
+        raise ValueError(f"cannot demux video in memory: {e}")
+    try:
+        if not container.streams.video:
+            raise ValueError("no video stream")
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        try:
+            for frame in container.decode(stream):
+                yield frame.to_ndarray(format="bgr24")
+        except av.FFmpegError:
+            return
+    finally:
+        container.close()
+
+
+def iter_frames_from_file(path):
+    """Yield BGR frames from a video file on disk via OpenCV"""
+    cap = cv2.VideoCapture(path)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def iter_frames_via_tempfile(data, suffix=".mp4"):
+    """Fallback: spill the bytes to a temp file and decode it with OpenCV"""
+    if isinstance(data, str):
+        yield from iter_frames_from_file(data)
+        return
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+        tmp_path = tmp.name
+    try:
+        yield from iter_frames_from_file(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+
+def iter_frames(data, suffix=".mp4"):
+    """Yield BGR frames from encoded video bytes.
+
+    Decodes in memory when possible and falls back to the temp-file path
+    only for inputs PyAV can't open.
+    """
+    frames = None
+    try:
+        frames = iter_frames_in_memory(data)
+        first = next(frames)
+    except StopIteration:
+        return
+    except ValueError:
+        frames = None
+    if frames is None:
+        yield from iter_frames_via_tempfile(data, suffix)
+        return
+    yield first
+    yield from frames
+
+
+def probe_video(data):
+    """(start, duration, fps) in seconds / frames per second of encoded video
+    bytes; any of them None if PyAV can't tell (or isn't installed)"""
+    if av is None:
+        return None, None, None
+    try:
+        container = _open_container(data)
+    except Exception:
+        return None, None, None
+    try:
+        if not container.streams.video:
+            return None, None, None
+        stream = container.streams.video[0]
+        start = float(stream.start_time * stream.time_base) if stream.start_time is not None else 0.0
+        if stream.duration is not None:
+            duration = float(stream.duration * stream.time_base)
+        elif container.duration is not None:
+            duration = container.duration / av.time_base
+        else:
+            duration = None  # e.g. MediaRecorder WebM
+        fps = float(stream.average_rate) if stream.average_rate else None
+        return start, duration, fps
+    finally:
+        container.close()
+
+
+def iter_timed_frames_in_memory(data, start=0.0, end=None):
+    """Yield (seconds, BGR frame) for the frames with start <= time < end,
+    seeking to the keyframe before `start` instead of decoding from the top"""
+    if av is None:
+        raise ValueError("PyAV not installed")
+    try:
+        container = _open_container(data)
+    except Exception as e:
+        raise ValueError(f"cannot demux video in memory: {e}")
+    try:
+        if not container.streams.video:
+            raise ValueError("no video stream")
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        try:
+            if start > 0:
+                container.seek(int(start / stream.time_base), stream=stream)
+        except av.FFmpegError:
+            pass  # unseekable: decode from the top, the time filter below still applies
+        try:
+            for frame in container.decode(stream):
+                if frame.time is None or frame.time < start:
+                    continue
+                if end is not None and frame.time >= end:
+                    break
+                yield frame.time, frame.to_ndarray(format="bgr24")
+        except av.FFmpegError:
+            return
+    finally:
+        container.close()
+
+
+def iter_timed_frames(data, suffix=".mp4", start=0.0, end=None):
+    """Yield (seconds, BGR frame) for the frames of encoded video bytes in [start, end).
+
+    Falls back to OpenCV on a temp file (decoding from the first frame) for
+    inputs PyAV can't open.
+    """
+    try:
+        yield from iter_timed_frames_in_memory(data, start, end)
+        return
+    except ValueError:
+        pass
+    if isinstance(data, str):
+        tmp_path = None
+    else:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            tmp.write(data)
+            tmp_path = tmp.name
+    cap = cv2.VideoCapture(tmp_path or data)
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            t = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            if t < start:
+                continue
+            if end is not None and t >= end:
+                break
+            yield t, frame
+    finally:
+        cap.release()
+        if tmp_path:
+            os.remove(tmp_path)
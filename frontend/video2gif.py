@@ -1,12 +1,44 @@
 import os
 import sys
+import json
+import hashlib
+import argparse
+import tempfile
 import subprocess
 from pathlib import Path
-import yt_dlp
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+FFMPEG = os.getenv("FFMPEG", "ffmpeg")
+FFPROBE = os.getenv("FFPROBE", "ffprobe")
+
+# Batch mode (--manifest) output, per sign, all relative to the output folder:
+#   NAME.gif                        GIF at the first --widths entry (what the app loads)
+#   variants/NAME/<width>.<format>  every format at every width
+#   index.json                      name -> duration, variants (path, format, width, bytes)
+DEFAULT_WIDTHS = (320, 160)
+DEFAULT_FORMATS = ("gif", "webm", "mp4")
+INDEX_FILE = "index.json"
+ENCODER_VERSION = 1  # bump when encode_args changes, to re-encode everything
+
+
+def encode_args(fmt, width, fps):
+    """ffmpeg output options for one variant."""
+    scale = f"fps={fps},scale={width}:-2:flags=lanczos"
+    if fmt == "gif":
+        # palettegen + paletteuse in one pass instead of a palette file
+        return ["-vf", f"{scale},split[a][b];[a]palettegen[p];[b][p]paletteuse", "-loop", "0"]
+    if fmt == "webm":
+        return ["-vf", scale, "-c:v", "libvpx-vp9", "-crf", "40", "-b:v", "0", "-row-mt", "1", "-an"]
+    if fmt == "mp4":
+        return ["-vf", scale, "-c:v", "libx264", "-preset", "slow", "-crf", "28", "-pix_fmt", "yuv420p",
+                "-movflags", "+faststart", "-an"]
+    raise ValueError(f"Unknown format: {fmt}")
 
 
 def download_youtube_video(url, output_dir):
     """Download the YouTube video and return its local file path."""
+    import yt_dlp
+
     ydl_opts = {
         "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/mp4",
         "outtmpl": str(Path(output_dir) / "%(title)s.%(ext)s"),
@@ -26,50 +58,168 @@ def convert_to_gif(video_path, output_dir, width=320, fps=15):
     gif_path = output_dir / (Path(video_path).stem + ".gif")
 
     # palette method gives better colors
-    palette = output_dir / "palette.png"
-
-    subprocess.run(
-        [
-            "ffmpeg",
-            "-y",
-            "-i", video_path,
-            "-vf", f"fps={fps},scale={width}:-1:flags=lanczos,palettegen",
-            str(palette),
-        ],
-        check=True,
-    )
-
-    subprocess.run(
-        [
-            "ffmpeg",
-            "-i", video_path,
-            "-i", str(palette),
-            "-filter_complex",
-            f"fps={fps},scale={width}:-1:flags=lanczos[x];[x][1:v]paletteuse",
-            "-loop", "0",
-            str(gif_path),
-        ],
-        check=True,
-    )
-
-    palette.unlink(missing_ok=True)
+    subprocess.run([FFMPEG, "-y", "-i", str(video_path), *encode_args("gif", width, fps), str(gif_path)],
+                   check=True)
     print(f"🎬 Converted to GIF: {gif_path}")
 
     return gif_path
 
 
+# --------------- BATCH MODE ---------------
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def probe_duration(path):
+    """Duration in seconds, or None if ffprobe can't tell."""
+    try:
+        out = subprocess.run(
+            [FFPROBE, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return round(float(out), 3)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def variant_path(name, fmt, width, widths):
+    if fmt == "gif" and width == widths[0]:
+        return f"{name}.gif"
+    return f"variants/{name}/{width}.{fmt}"
+
+
+def load_manifest(path):
+    """{"NAME": "clip path", ...}; clip paths are relative to the manifest."""
+    path = Path(path)
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    return {name: (path.parent / source).resolve() for name, source in entries.items()}
+
+
+def load_index(output_dir):
+    try:
+        with open(Path(output_dir) / INDEX_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"signs": {}}
+
+
+def save_index(output_dir, index):
+    """Write the index atomically, so a server never reads half of it."""
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, Path(output_dir) / INDEX_FILE)
+
+
+def transcode_sign(name, source, output_dir, widths, formats, fps, previous=None):
+    """Encode every variant of one sign in a single ffmpeg run (the source is decoded once).
+
+    Returns (index entry, whether ffmpeg ran). Skipped when `previous`
+    was built from the same source bytes and settings and its files exist.
+    """
+    output_dir = Path(output_dir)
+    settings = {"widths": list(widths), "formats": list(formats), "fps": fps, "encoder": ENCODER_VERSION}
+    source_hash = file_sha256(source)
+    if (previous and previous.get("source_sha256") == source_hash and previous.get("settings") == settings
+            and all((output_dir / v["path"]).exists() for v in previous["variants"])):
+        return previous, False
+
+    outputs = [(fmt, width, variant_path(name, fmt, width, widths)) for width in widths for fmt in formats]
+    command = [FFMPEG, "-y", "-v", "error", "-i", str(source)]
+    for fmt, width, path in outputs:
+        (output_dir / path).parent.mkdir(parents=True, exist_ok=True)
+        command += [*encode_args(fmt, width, fps), str(output_dir / path)]
+    subprocess.run(command, check=True)
+
+    variants = [{"format": fmt, "width": width, "path": path, "bytes": (output_dir / path).stat().st_size}
+                for fmt, width, path in outputs]
+    entry = {
+        "duration": probe_duration(source),
+        "source_sha256": source_hash,
+        "settings": settings,
+        "variants": sorted(variants, key=lambda v: v["bytes"]),
+    }
+    return entry, True
+
+
+def run_batch(manifest_path, output_dir, widths=DEFAULT_WIDTHS, formats=DEFAULT_FORMATS, fps=15, jobs=None,
+              force=False):
+    """Transcode every sign in the manifest on a pool of ffmpeg processes and update the index.
+
+    Returns the number of signs that failed.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    index = load_index(output_dir)
+    signs = index.setdefault("signs", {})
+    built = skipped = failed = 0
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = {
+            pool.submit(transcode_sign, name, source, output_dir, widths, formats, fps,
+                        None if force else signs.get(name)): name
+            for name, source in manifest.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                entry, ran = future.result()
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"❌ {name}: {e}")
+                failed += 1
+                continue
+            signs[name] = entry
+            if ran:
+                built += 1
+                sizes = ", ".join(f"{v['width']}.{v['format']} {v['bytes'] // 1024} KB" for v in entry["variants"])
+                print(f"🎬 {name}: {sizes}")
+            else:
+                skipped += 1
+
+    save_index(output_dir, index)
+    print(f"\n✅ {built} transcoded, {skipped} unchanged, {failed} failed; index at {output_dir / INDEX_FILE}")
+    return failed
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python yt_to_gif.py <youtube_url>")
+    parser = argparse.ArgumentParser(
+        description="Turn a YouTube clip into a sign GIF, or batch-transcode local clips (--manifest)",
+    )
+    parser.add_argument("url", nargs="?", help="YouTube URL to download and convert")
+    parser.add_argument("--manifest", help='JSON file {"SIGN-NAME": "clip.mp4", ...}')
+    parser.add_argument("--out", help="output folder (default: public/asl_gifs)")
+    parser.add_argument("--widths", default=",".join(map(str, DEFAULT_WIDTHS)),
+                        help="comma-separated widths; the first is also NAME.gif")
+    parser.add_argument("--formats", default=",".join(DEFAULT_FORMATS))
+    parser.add_argument("--fps", type=int, default=15)
+    parser.add_argument("--jobs", type=int, help="parallel ffmpeg processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-encode even unchanged clips")
+    args = parser.parse_args()
+    if not args.url and not args.manifest:
+        parser.print_usage()
         sys.exit(1)
 
-    url = sys.argv[1]
-
     # ✅ Define absolute output folder: public/asl_gifs
     project_root = Path(__file__).resolve().parent
-    output_dir = project_root / "public" / "asl_gifs"
+    output_dir = Path(args.out) if args.out else project_root / "public" / "asl_gifs"
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    if args.manifest:
+        widths = tuple(int(w) for w in args.widths.split(","))
+        formats = tuple(args.formats.split(","))
+        failed = run_batch(args.manifest, output_dir, widths, formats, args.fps, args.jobs, args.force)
+        sys.exit(1 if failed else 0)
+
+    url = args.url
+
     # Step 1: download video temporarily (store in same folder)
     video_path = download_youtube_video(url, output_dir)
 